@@ -5,34 +5,259 @@ Given an original prompt + two AI responses (Claude and GPT), picks the better o
 Uses a fast/cheap model (gpt-4o-mini) to keep latency and cost low.
 
 Usage:
-  python3 ai-supervisor.py <prompt_file> <response_a_file> <response_b_file>
+  python3 ai-supervisor.py [--race] [--no-cache] <prompt_file> <response_a_file> <response_b_file>
 
 Outputs the better response to stdout.
 Writes a brief reasoning log to stderr.
+
+--race (or SUPERVISOR_RACE=1): score A and B locally first with cheap
+deterministic checks — length bounds, word overlap with the prompt, and
+banned phrases. If one response leads by at least SUPERVISOR_MARGIN (default
+0.15) it wins without an API call. Otherwise gpt-4o-mini is asked for just
+"WINNER: A|B" and the chosen response is printed from its file, so the judge
+never re-types the answer.
+
+Judge verdicts are cached in SQLite (SUPERVISOR_CACHE_DB, default
+$AOS_ROOT/tmp/ai-supervisor-cache.sqlite), keyed by a hash of the
+truncated prompt and both responses, so re-runs of the same pair cost
+nothing. Entries expire after SUPERVISOR_CACHE_TTL seconds (default 7 days)
+and the least recently used are dropped beyond SUPERVISOR_CACHE_MAX rows
+(default 5000). --no-cache skips the cache entirely.
 """
 
 import sys
 import os
+import re
+import time
+import hashlib
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from openai_client import chat  # noqa: E402
+
+WS = os.environ.get('AOS_ROOT', '/Users/henryburton/.openclaw/workspace-anthropic')
+CACHE_DB = os.environ.get('SUPERVISOR_CACHE_DB', f'{WS}/tmp/ai-supervisor-cache.sqlite')
+CACHE_TTL = float(os.environ.get('SUPERVISOR_CACHE_TTL', str(7 * 86400)))
+CACHE_MAX = int(os.environ.get('SUPERVISOR_CACHE_MAX', '5000'))
+
+RACE_MARGIN = float(os.environ.get('SUPERVISOR_MARGIN', '0.15'))
+
+MIN_CHARS = 40
+MAX_CHARS = 6000
+
+BANNED_PHRASES = (
+    'as an ai', 'as a language model', "i can't help with", 'i cannot help with',
+    "i'm unable to", "i don't have access", 'i do not have access',
+    'i hope this helps', 'let me know if you', 'great question',
+    'certainly!', 'absolutely!', '[your name]', '[insert', 'lorem ipsum',
+)
+
+STOPWORDS = frozenset("""
+about above after again also because been before being below between both
+cannot could does doing down during each from further have having here
+into just more most only other over same should some such than that their
+them then there these they this those through under until very were what
+when where which while will with would your yours
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'\-]{3,}")
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS}
+
+
+def local_score(prompt_terms: set, response: str):
+    """Heuristic quality score (higher is better) and a short breakdown."""
+    text = response.strip()
+    n = len(text)
+    notes = []
+
+    # Grounding: share of the response's content words that come from the prompt
+    terms = _terms(text)
+    grounding = len(terms & prompt_terms) / len(terms) if terms else 0.0
+    score = grounding
+    notes.append(f'grounding {grounding:.2f}')
+
+    if n < MIN_CHARS:
+        score -= 0.5
+        notes.append('too short')
+    elif n > MAX_CHARS:
+        over = min(1.0, (n - MAX_CHARS) / MAX_CHARS)
+        score -= 0.3 * over
+        notes.append('too long')
+
+    lowered = text.lower()
+    hits = [p for p in BANNED_PHRASES if p in lowered]
+    if hits:
+        score -= 0.15 * len(hits)
+        notes.append('banned: ' + ', '.join(hits))
+
+    return score, '; '.join(notes)
+
+
+class JudgeCache:
+    """Verdicts keyed by sha256(mode, truncated prompt, A, B); TTL + LRU row cap."""
+
+    def __init__(self, path: str = CACHE_DB, ttl: float = CACHE_TTL, max_rows: int = CACHE_MAX):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=2)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS verdicts (
+            key TEXT PRIMARY KEY, winner TEXT NOT NULL, reason TEXT,
+            created REAL NOT NULL, used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS verdicts_used ON verdicts(used)")
+        self.db.commit()
+
+    @staticmethod
+    def key(mode: str, prompt: str, response_a: str, response_b: str) -> str:
+        h = hashlib.sha256()
+        for part in (mode, prompt[:3000], response_a, response_b):
+            data = part.encode()
+            h.update(len(data).to_bytes(8, 'big'))
+            h.update(data)
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """(winner, reason) if cached and fresh, else None."""
+        now = time.time()
+        row = self.db.execute("SELECT winner, reason, created FROM verdicts WHERE key = ?",
+                              (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[2] > self.ttl:
+            self.db.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+            self.db.commit()
+            return None
+        self.db.execute("UPDATE verdicts SET used = ? WHERE key = ?", (now, key))
+        self.db.commit()
+        return row[0], row[1] or ''
+
+    def put(self, key: str, winner: str, reason: str):
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)",
+                        (key, winner, reason, now, now))
+        self.db.execute("DELETE FROM verdicts WHERE created < ?", (now - self.ttl,))
+        self.db.execute("""DELETE FROM verdicts WHERE key IN (
+            SELECT key FROM verdicts ORDER BY used DESC LIMIT -1 OFFSET ?)""", (self.max_rows,))
+        self.db.commit()
+
+
+def open_cache(enabled: bool):
+    if not enabled:
+        return None
+    try:
+        return JudgeCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"[supervisor] Cache unavailable: {e}", file=sys.stderr)
+        return None
+
+
+def cache_get(cache, key):
+    try:
+        return cache.get(key) if cache else None
+    except sqlite3.Error:
+        return None
+
+
+def cache_put(cache, key, winner, reason):
+    try:
+        if cache:
+            cache.put(key, winner, reason)
+    except sqlite3.Error:
+        pass
+
+
+def race(prompt: str, response_a: str, response_b: str, api_key: str, cache=None) -> str:
+    """Pick a winner locally when the margin is clear; otherwise ask for a one-word verdict."""
+    prompt_terms = _terms(prompt)
+    score_a, why_a = local_score(prompt_terms, response_a)
+    score_b, why_b = local_score(prompt_terms, response_b)
+    print(f"[supervisor] Local A={score_a:.2f} ({why_a}) | B={score_b:.2f} ({why_b})", file=sys.stderr)
+
+    local = 'A' if score_a >= score_b else 'B'
+    if abs(score_a - score_b) >= RACE_MARGIN:
+        print(f"[supervisor] Winner: {local} — local margin {abs(score_a - score_b):.2f}", file=sys.stderr)
+        return local
+    if not api_key:
+        print(f"[supervisor] Winner: {local} — small margin, no OPENAI_API_KEY for judge", file=sys.stderr)
+        return local
+
+    key = JudgeCache.key('race', prompt, response_a, response_b)
+    hit = cache_get(cache, key)
+    if hit:
+        print(f"[supervisor] Winner: {hit[0]} — cached judge: {hit[1]}", file=sys.stderr)
+        return hit[0]
+
+    judge_prompt = f"""You are a quality supervisor comparing two AI responses to the same task.
+
+ORIGINAL TASK (truncated):
+{prompt[:3000]}
+
+---
+
+RESPONSE A:
+{response_a}
+
+---
+
+RESPONSE B:
+{response_b}
+
+---
+
+Judge accuracy (grounded in the task, nothing invented), completeness, tone,
+specificity and conciseness. Do not repeat either response.
+
+Reply in this exact format:
+WINNER: A or B
+REASON: One short sentence."""
+
+    try:
+        output = chat([{"role": "user", "content": judge_prompt}],
+                      model='gpt-4o-mini', temperature=0, max_tokens=60, api_key=api_key)
+    except Exception as e:
+        print(f"[supervisor] Judge ERROR: {e} — using local pick {local}", file=sys.stderr)
+        return local
+
+    match = re.search(r'WINNER:\s*\**\s*([AB])\b', output)
+    reason = re.search(r'REASON:\s*(.+)', output)
+    if not match:
+        print(f"[supervisor] Judge reply unparseable — using local pick {local}", file=sys.stderr)
+        return local
+    winner, why = match.group(1), reason.group(1).strip() if reason else ''
+    cache_put(cache, key, winner, why)
+    print(f"[supervisor] Winner: {winner} — judge: {why}", file=sys.stderr)
+    return winner
+
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: ai-supervisor.py <prompt_file> <response_a> <response_b>", file=sys.stderr)
+    flags = {a for a in sys.argv[1:] if a.startswith('--')}
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    race_mode = '--race' in flags or os.environ.get('SUPERVISOR_RACE', '') == '1'
+    use_cache = '--no-cache' not in flags
+    if len(args) < 3:
+        print("Usage: ai-supervisor.py [--race] [--no-cache] <prompt_file> <response_a> <response_b>",
+              file=sys.stderr)
         sys.exit(1)
+    prompt_path, path_a, path_b = args[:3]
 
     api_key = os.environ.get('OPENAI_API_KEY', '')
-    if not api_key:
+    if not api_key and not race_mode:
         # No key — fall back to response_a (Claude) by default
         print("[supervisor] No OPENAI_API_KEY — defaulting to response A", file=sys.stderr)
-        with open(sys.argv[2], 'r') as f:
+        with open(path_a, 'r') as f:
             print(f.read())
         return
 
     try:
-        with open(sys.argv[1], 'r') as f:
-            original_prompt = f.read()[:3000]  # Truncate for supervisor context
-        with open(sys.argv[2], 'r') as f:
+        with open(prompt_path, 'r') as f:
+            full_prompt = f.read()
+        original_prompt = full_prompt[:3000]  # Truncate for supervisor context
+        with open(path_a, 'r') as f:
             response_a = f.read()
-        with open(sys.argv[3], 'r') as f:
+        with open(path_b, 'r') as f:
             response_b = f.read()
     except Exception as e:
         print(f"[supervisor] ERROR reading files: {e}", file=sys.stderr)
@@ -52,6 +277,20 @@ def main():
         print(response_a)
         return
 
+    cache = open_cache(use_cache)
+
+    if race_mode:
+        winner = race(full_prompt, response_a, response_b, api_key, cache)
+        print(response_a if winner == 'A' else response_b)
+        return
+
+    key = JudgeCache.key('full', original_prompt, response_a, response_b)
+    hit = cache_get(cache, key)
+    if hit:
+        print(f"[supervisor] Winner: {hit[0]} — cached: {hit[1]}", file=sys.stderr)
+        print(response_a if hit[0] == 'A' else response_b)
+        return
+
     supervisor_prompt = f"""You are a quality supervisor comparing two AI responses to the same task.
 
 ORIGINAL TASK (truncated):
@@ -83,17 +322,8 @@ RESPONSE:
 [paste the full winning response verbatim here]"""
 
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-
-        result = client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=[{"role": "user", "content": supervisor_prompt}],
-            temperature=0.1,
-            max_tokens=5000,
-        )
-
-        output = result.choices[0].message.content or ''
+        output = chat([{"role": "user", "content": supervisor_prompt}],
+                      model='gpt-4o-mini', temperature=0.1, max_tokens=5000, api_key=api_key)
 
         # Parse winner and response
         lines = output.strip().split('\n')
@@ -116,6 +346,8 @@ RESPONSE:
             # Parsing failed — use stated winner
             final = response_a if winner == 'A' else response_b
 
+        if winner in ('A', 'B'):
+            cache_put(cache, key, winner, reason)
         print(f"[supervisor] Winner: {winner} — {reason}", file=sys.stderr)
         print(final)
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+bench-clean-user-text.py
+Benchmark fixture for clean_user_text() in session-to-daily-log.py.
+
+Builds worst-case OpenClaw user messages (many large <relevant-memories>
+blocks, [System Message] runs with no blank line, unclosed markers,
+metadata JSON blocks), checks the single-pass cleaner against the original
+four-regex implementation, and times both.
+
+Exits non-zero if any output differs from the reference, or if the cleaner
+is slower than --max-ratio times the reference on any fixture.
+
+Usage:
+  python3 bench-clean-user-text.py [--repeat 5] [--max-ratio 1.0]
+"""
+
+import argparse
+import importlib.util
+import re
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def load_daily_log():
+    spec = importlib.util.spec_from_file_location("session_to_daily_log", SCRIPTS / "session-to-daily-log.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def reference_clean(text: str) -> str:
+    """The original four-pass implementation, kept as the behavioural reference."""
+    text = re.sub(r'<relevant-memories>.*?</relevant-memories>', '', text, flags=re.DOTALL)
+    text = re.sub(r'\[System Message\].*?(?=\n\n|\Z)', '', text, flags=re.DOTALL)
+    text = re.sub(r'Conversation info \(untrusted metadata\):.*?```\n', '', text, flags=re.DOTALL)
+    text = re.sub(r'^\[.*?GMT[+-]\d+\]\s*', '', text.strip())
+    return text.strip()
+
+
+def memory_block(i: int, size: int) -> str:
+    body = "\n".join(f"- [{i}.{j}] Josh prefers short replies; client Ascend LC renewal due" for j in range(size))
+    return f"<relevant-memories>\n{body}\n</relevant-memories>\n"
+
+
+CONV_INFO = (
+    "Conversation info (untrusted metadata):\n```json\n"
+    '{"chat_id": "1140320036", "sender": "Josh", "channel": "telegram"}\n```\n'
+)
+
+
+def fixtures() -> dict:
+    return {
+        "typical": (
+            "[Fri 2026-02-20 09:24 GMT+2] " + memory_block(0, 20) + CONV_INFO
+            + "[System Message] heartbeat ok\n\nCan you check the Sophia queue?"
+        ),
+        "many_memories": "".join(memory_block(i, 40) for i in range(200)) + "What's on today?",
+        "system_no_blank_line": "[System Message] " + "status line\n" * 50_000 + "tail",
+        "many_system_messages": "".join(f"[System Message] event {i}\n" for i in range(20_000)) + "\nhi",
+        "unclosed_memories": "<relevant-memories>\n" * 2_000 + "x" * 200_000,
+        "unclosed_conv_info": "Conversation info (untrusted metadata): {}\n" * 2_000 + "hello",
+        "memory_inside_system": "[System Message] a\n" + memory_block(1, 5) + "\nreal question here",
+        "plain_long": "Please draft the weekly report for Race Technik. " * 20_000,
+    }
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark clean_user_text")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-ratio", type=float, default=1.0,
+                    help="Fail if new/ref time exceeds this on any fixture (default 1.0)")
+    args = ap.parse_args()
+
+    clean = load_daily_log().clean_user_text
+    failed = False
+
+    print(f"{'fixture':<24} {'size':>9} {'reference':>11} {'cleaner':>11} {'speedup':>8}")
+    for name, text in fixtures().items():
+        if clean(text) != reference_clean(text):
+            print(f"{name:<24} OUTPUT MISMATCH", file=sys.stderr)
+            failed = True
+            continue
+        ref = best_of(reference_clean, text, args.repeat)
+        new = best_of(clean, text, args.repeat)
+        flag = ""
+        if new > ref * args.max_ratio:
+            flag = "  REGRESSION"
+            failed = True
+        print(f"{name:<24} {len(text):>9,} {ref * 1000:>9.2f}ms {new * 1000:>9.2f}ms {ref / new:>7.1f}x{flag}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+bench-conversation-extract.py
+Micro-benchmark for extract_conversation() in index-conversations.py.
+
+Generates a synthetic Claude Code JSONL corpus (mostly large tool results,
+like real sessions) and reports lines/second for:
+  - naive       json.loads on every line (the old per-line cost floor)
+  - stdlib      extract_conversation() with the stdlib json backend
+  - <backend>   extract_conversation() with the fastest installed backend
+
+Usage:
+  python3 bench-conversation-extract.py [--mb 500] [--corpus path.jsonl] [--keep]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def load_indexer():
+    spec = importlib.util.spec_from_file_location("index_conversations", SCRIPTS / "index-conversations.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def make_corpus(path: Path, mb: int, seed: int = 7):
+    rnd = random.Random(seed)
+    words = ("deploy supabase agent task queue email client invoice launchagent "
+             "python bash schema webhook retry cron token session memory").split()
+
+    def prose(n):
+        return " ".join(rnd.choice(words) for _ in range(n))
+
+    base = {"sessionId": "bench", "cwd": "/Users/henryburton/.openclaw", "timestamp": "2026-03-01T08:00:00.000Z"}
+    target = mb * 1024 * 1024
+    written = 0
+    lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            r = rnd.random()
+            if r < 0.60:
+                rec = {**base, "type": "user", "message": {"role": "user", "content": [
+                    {"type": "tool_result", "tool_use_id": "toolu_x", "content": prose(rnd.randint(500, 3000))}]},
+                    "toolUseResult": {"stdout": prose(200)}}
+            elif r < 0.75:
+                rec = {**base, "type": "assistant", "message": {"role": "assistant", "content": [
+                    {"type": "tool_use", "id": "toolu_x", "name": "Bash", "input": {"command": prose(20)}}]}}
+            elif r < 0.85:
+                rec = {**base, "type": "user", "message": {"role": "user", "content": prose(rnd.randint(5, 80))}}
+            elif r < 0.95:
+                rec = {**base, "type": "assistant", "message": {"role": "assistant", "content": [
+                    {"type": "text", "text": prose(rnd.randint(20, 300))}]}}
+            else:
+                rec = {**base, "type": "progress", "data": prose(50)}
+            line = json.dumps(rec, separators=(",", ":")) + "\n"
+            f.write(line)
+            written += len(line)
+            lines += 1
+    return lines
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark conversation extraction")
+    ap.add_argument("--mb", type=int, default=500, help="Synthetic corpus size in MB (default 500)")
+    ap.add_argument("--corpus", help="Use or create the corpus at this path")
+    ap.add_argument("--keep", action="store_true", help="Keep a generated corpus")
+    args = ap.parse_args()
+
+    idx = load_indexer()
+
+    if args.corpus and os.path.exists(args.corpus):
+        corpus = Path(args.corpus)
+    else:
+        corpus = Path(args.corpus) if args.corpus else Path(tempfile.mkstemp(suffix=".jsonl", prefix="bench-conv-")[1])
+        print(f"Generating {args.mb} MB corpus at {corpus}...", file=sys.stderr)
+        make_corpus(corpus, args.mb)
+
+    with open(corpus, "rb") as f:
+        n_lines = sum(1 for _ in f)
+    size_mb = corpus.stat().st_size / 1024 / 1024
+
+    def naive():
+        with open(corpus, encoding="utf-8", errors="ignore") as f:
+            for raw in f:
+                json.loads(raw)
+
+    fast_backend, fast_loads = idx.JSON_BACKEND, idx._loads
+    results = [("naive", timed(naive))]
+
+    idx._loads = json.loads
+    results.append(("stdlib", timed(lambda: idx.extract_conversation(corpus))))
+    if fast_backend != "json":
+        idx._loads = fast_loads
+        results.append((fast_backend, timed(lambda: idx.extract_conversation(corpus))))
+
+    print(f"Corpus: {n_lines:,} lines, {size_mb:.0f} MB")
+    for name, secs in results:
+        print(f"  {name:<10} {secs:7.2f}s  {n_lines / secs:>12,.0f} lines/s  {size_mb / secs:7.1f} MB/s")
+
+    if not args.corpus and not args.keep:
+        corpus.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+bench-openai-latency.py
+End-to-end latency benchmark for the OpenAI call paths, run offline against
+openai-standin.py.
+
+Drives each entry point the way production does and reports wall time and
+overhead (wall time minus the stand-in's simulated model time) at
+p50/p95/p99. Overhead covers interpreter start-up, imports, subprocess hops,
+temp files, the local daemon round trip and connection set-up.
+
+Entry points:
+  client-inprocess    openai_client.chat() in this process (floor)
+  openai-call         python3 openai-call.py prompt.txt
+  openai-call-daemon  the same, with openai-complete-daemon.py running
+  openai-call-stream  openai-call.py --stream
+  supervisor-race     ai-supervisor.py --race --no-cache on a near tie (judge call)
+  supervisor-full     ai-supervisor.py --no-cache (full verdict + pasted response)
+  discord-path        temp prompt file + bash openai-complete.sh, as the Discord bot does
+  discord-generate    discord-community-bot.generate_response() (needs discord.py)
+
+Everything runs with AOS_ROOT pointed at a scratch directory, so caches,
+sockets and the real .env.scheduler are untouched.
+
+Usage:
+  python3 bench-openai-latency.py [--samples 20] [--latency-ms 200] [--tokens-per-sec 0]
+                                  [--only openai-call,discord-path] [--json]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+STANDIN = Path(__file__).resolve().parent / "openai-standin.py"
+
+PROMPT = "Summarise the Thursday invoice for the Amalfi project: 14 hours logged, two site visits."
+RESPONSE_A = "The Thursday invoice for the Amalfi project covers 14 hours logged and two site visits."
+RESPONSE_B = "Thursday's Amalfi project invoice: 14 hours logged plus two site visits."
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class Standin:
+    def __init__(self, args):
+        self.port = free_port()
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.proc = subprocess.Popen(
+            [sys.executable, str(STANDIN), "--port", str(self.port),
+             "--latency-ms", str(args.latency_ms), "--tokens-per-sec", str(args.tokens_per_sec),
+             "--reply-tokens", str(args.reply_tokens)],
+            stdout=subprocess.DEVNULL,
+        )
+        if not wait_for(lambda: self._up()):
+            raise SystemExit("stand-in did not start")
+
+    def _up(self):
+        try:
+            self.stats()
+            return True
+        except OSError:
+            return False
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.base}/__stats", timeout=2) as r:
+            return json.loads(r.read())
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+class Bench:
+    def __init__(self, args, standin, scratch):
+        self.args = args
+        self.standin = standin
+        self.scratch = scratch
+        self.env = dict(os.environ, AOS_ROOT=str(scratch), OPENAI_API_KEY="bench",
+                        OPENAI_BASE_URL=f"{standin.base}/v1", OPENAI_DAEMON_SOCK=str(scratch / "tmp" / "oai.sock"))
+        for var in ("OPENAI_CACHE_TTL", "SUPERVISOR_RACE"):
+            self.env.pop(var, None)
+        (scratch / "tmp").mkdir(parents=True, exist_ok=True)
+        self.prompt_file = scratch / "prompt.txt"
+        self.prompt_file.write_text(PROMPT)
+        self.resp_a = scratch / "a.txt"
+        self.resp_b = scratch / "b.txt"
+        self.resp_a.write_text(RESPONSE_A)
+        self.resp_b.write_text(RESPONSE_B)
+        self.daemon = None
+
+    def measure(self, fn):
+        """[(wall_s, overhead_s)] for --samples runs of fn, after one warm-up."""
+        fn()
+        results = []
+        for _ in range(self.args.samples):
+            before = self.standin.stats()["model_seconds"]
+            t0 = time.perf_counter()
+            fn()
+            wall = time.perf_counter() - t0
+            model = self.standin.stats()["model_seconds"] - before
+            results.append((wall, max(0.0, wall - model)))
+        return results
+
+    def run(self, cmd, stdin=None):
+        proc = subprocess.run(cmd, env=self.env, stdin=stdin, capture_output=True, text=True)
+        if proc.returncode != 0 or not proc.stdout.strip():
+            raise RuntimeError(f"{' '.join(map(str, cmd[:3]))} failed: {proc.stderr.strip()[-300:]}")
+        return proc.stdout
+
+    # ── entry points ─────────────────────────────────────────────────────────
+
+    def client_inprocess(self):
+        sys.path.insert(0, str(SCRIPTS / "lib"))
+        os.environ.update({k: self.env[k] for k in ("OPENAI_BASE_URL", "AOS_ROOT", "OPENAI_DAEMON_SOCK")})
+        spec = importlib.util.spec_from_file_location("openai_client_bench", SCRIPTS / "lib" / "openai_client.py")
+        client = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(client)
+        messages = [{"role": "user", "content": PROMPT}]
+        return self.measure(lambda: client.chat(messages, api_key="bench", use_daemon=False))
+
+    def openai_call(self):
+        return self.measure(lambda: self.run([sys.executable, SCRIPTS / "openai-call.py", self.prompt_file]))
+
+    def openai_call_daemon(self):
+        self.start_daemon()
+        try:
+            return self.openai_call()
+        finally:
+            self.stop_daemon()
+
+    def openai_call_stream(self):
+        return self.measure(lambda: self.run([sys.executable, SCRIPTS / "openai-call.py", "--stream",
+                                              self.prompt_file]))
+
+    def supervisor_race(self):
+        return self.measure(lambda: self.run([sys.executable, SCRIPTS / "ai-supervisor.py", "--race",
+                                              "--no-cache", self.prompt_file, self.resp_a, self.resp_a]))
+
+    def supervisor_full(self):
+        return self.measure(lambda: self.run([sys.executable, SCRIPTS / "ai-supervisor.py", "--no-cache",
+                                              self.prompt_file, self.resp_a, self.resp_b]))
+
+    def discord_path(self):
+        def once():
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False,
+                                             dir=self.scratch, prefix="discord-prompt-") as f:
+                f.write(PROMPT)
+            try:
+                with open(f.name) as stdin:
+                    self.run(["bash", SCRIPTS / "lib" / "openai-complete.sh", "--model", "gpt-4o"], stdin=stdin)
+            finally:
+                os.unlink(f.name)
+        return self.measure(once)
+
+    def discord_generate(self):
+        if importlib.util.find_spec("discord") is None:
+            raise RuntimeError("skipped: discord.py is not installed")
+        os.environ.update({k: self.env[k] for k in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "AOS_ROOT",
+                                                    "OPENAI_DAEMON_SOCK")})
+        spec = importlib.util.spec_from_file_location("discord_bot_bench", SCRIPTS / "discord-community-bot.py")
+        bot = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(bot)
+        if hasattr(bot, "OPENAI_COMPLETE"):
+            bot.OPENAI_COMPLETE = str(SCRIPTS / "lib" / "openai-complete.sh")
+        gen = bot.generate_response
+        if asyncio.iscoroutinefunction(gen):
+            loop = asyncio.new_event_loop()
+            try:
+                return self.measure(lambda: loop.run_until_complete(gen(PROMPT, "bench")))
+            finally:
+                closer = getattr(bot, "close_http_session", None)
+                if closer:
+                    loop.run_until_complete(closer())
+                loop.close()
+        return self.measure(lambda: gen(PROMPT, "bench"))
+
+    # ── daemon ───────────────────────────────────────────────────────────────
+
+    def start_daemon(self):
+        sock = Path(self.env["OPENAI_DAEMON_SOCK"])
+        self.daemon = subprocess.Popen([sys.executable, SCRIPTS / "openai-complete-daemon.py"], env=self.env,
+                                       stderr=subprocess.DEVNULL)
+        if not wait_for(sock.exists):
+            raise RuntimeError("daemon did not start")
+
+    def stop_daemon(self):
+        if self.daemon:
+            self.daemon.terminate()
+            self.daemon.wait()
+            self.daemon = None
+
+
+ENTRIES = ["client-inprocess", "openai-call", "openai-call-daemon", "openai-call-stream",
+           "supervisor-race", "supervisor-full", "discord-path", "discord-generate"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--samples", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=200.0, help="Stand-in time to first token")
+    ap.add_argument("--tokens-per-sec", type=float, default=0.0, help="Stand-in token rate (0 = instant)")
+    ap.add_argument("--reply-tokens", type=int, default=60)
+    ap.add_argument("--only", default="", help="Comma-separated entry points to run")
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args()
+
+    selected = [e for e in ENTRIES if not args.only or e in args.only.split(",")]
+    scratch = Path(tempfile.mkdtemp(prefix="bench-openai-"))
+    standin = Standin(args)
+    bench = Bench(args, standin, scratch)
+    report = {}
+    try:
+        for name in selected:
+            try:
+                samples = getattr(bench, name.replace("-", "_"))()
+            except RuntimeError as e:
+                report[name] = {"error": str(e)}
+                continue
+            walls = [w for w, _ in samples]
+            overheads = [o for _, o in samples]
+            report[name] = {
+                "n": len(samples),
+                **{f"wall_p{q}_ms": round(percentile(walls, q) * 1000, 1) for q in (50, 95, 99)},
+                **{f"overhead_p{q}_ms": round(percentile(overheads, q) * 1000, 1) for q in (50, 95, 99)},
+            }
+    finally:
+        bench.stop_daemon()
+        standin.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"stand-in: {args.latency_ms:.0f} ms to first token, "
+          f"{args.tokens_per_sec or 'instant'} tok/s, {args.reply_tokens} tokens; {args.samples} samples\n")
+    print(f"{'entry point':<20} {'wall p50':>9} {'p95':>8} {'p99':>8}   {'overhead p50':>12} {'p95':>8} {'p99':>8}")
+    for name, r in report.items():
+        if "error" in r:
+            print(f"{name:<20} {r['error']}")
+            continue
+        print(f"{name:<20} {r['wall_p50_ms']:>9.1f} {r['wall_p95_ms']:>8.1f} {r['wall_p99_ms']:>8.1f}   "
+              f"{r['overhead_p50_ms']:>12.1f} {r['overhead_p95_ms']:>8.1f} {r['overhead_p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+openai-standin.py
+Minimal local stand-in for the OpenAI chat completions endpoint, for running
+openai-call.py, ai-supervisor.py, openai-complete.sh and the Discord bot
+offline and for measuring their overhead.
+
+POST /v1/chat/completions returns a deterministic reply of --reply-tokens
+words, after --latency-ms (time to first token) plus one token every
+1/--tokens-per-sec seconds. "stream": true is answered as SSE chunks at the
+same pace. Prompts asking for "WINNER: A or B" get a supervisor-style
+verdict. --error-rate injects 429/500 responses (--error-codes) and
+--cut-rate drops streams half way.
+
+Speaks HTTP/1.1 keep-alive. GET /__stats reports connections, requests,
+injected errors and model_seconds — the total time spent simulating the
+model — so a benchmark can subtract it from wall time. POST /__reset clears
+the counters.
+
+Usage:
+  python3 openai-standin.py [--port 54330] [--latency-ms 300] [--tokens-per-sec 0]
+                            [--reply-tokens 60] [--error-rate 0] [--cut-rate 0]
+  OPENAI_BASE_URL=http://127.0.0.1:54330/v1 OPENAI_API_KEY=test python3 openai-call.py prompt.txt
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATS = {"connections": 0, "requests": 0, "errors": 0, "cut": 0, "model_seconds": 0.0}
+LOCK = threading.Lock()
+
+
+def _reply_text(prompt, n_tokens):
+    if "WINNER: A or B" in prompt:
+        text = "WINNER: A\nREASON: Stand-in verdict."
+        if "RESPONSE:" in prompt:
+            text += "\nRESPONSE:\n" + " ".join(f"word{i}" for i in range(n_tokens))
+        return text
+    return " ".join(f"word{i}" for i in range(n_tokens))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.3
+    tokens_per_sec = 0.0
+    reply_tokens = 60
+    error_rate = 0.0
+    error_codes = (429, 500)
+    cut_rate = 0.0
+
+    def setup(self):
+        super().setup()
+        with LOCK:
+            STATS["connections"] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _model_time(self, seconds):
+        time.sleep(seconds)
+        with LOCK:
+            STATS["model_seconds"] += seconds
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            with LOCK:
+                return self._send(200, dict(STATS))
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(n)) if n else {}
+        if self.path == "/__reset":
+            with LOCK:
+                STATS.update(requests=0, errors=0, cut=0, model_seconds=0.0)
+            return self._send(200, {})
+        if not self.path.endswith("/chat/completions"):
+            return self._send(404, {"error": "not found"})
+
+        with LOCK:
+            STATS["requests"] += 1
+        self._model_time(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            with LOCK:
+                STATS["errors"] += 1
+            return self._send(random.choice(self.error_codes), {"error": {"message": "injected failure"}})
+
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        limit = body.get("max_tokens") or 10 ** 6
+        words = _reply_text(prompt, self.reply_tokens).split(" ")
+        finish = "length" if len(words) > limit else "stop"
+        words = words[:limit]
+        per_token = 1 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+        if not body.get("stream"):
+            self._model_time(per_token * len(words))
+            return self._send(200, {
+                "object": "chat.completion",
+                "model": body.get("model", "stand-in"),
+                "choices": [{"index": 0, "finish_reason": finish,
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        cut_at = len(words) // 2 if self.cut_rate and random.random() < self.cut_rate else None
+        for i, word in enumerate(words):
+            if i == cut_at:
+                with LOCK:
+                    STATS["cut"] += 1
+                self.close_connection = True
+                return
+            if per_token:
+                self._model_time(per_token)
+            delta = {"content": word + (" " if i < len(words) - 1 else "")}
+            self._chunk(b"data: " + json.dumps({"choices": [{"index": 0, "delta": delta,
+                                                             "finish_reason": None}]}).encode() + b"\n\n")
+        self._chunk(b"data: " + json.dumps({"choices": [{"index": 0, "delta": {},
+                                                         "finish_reason": finish}]}).encode() + b"\n\n")
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local OpenAI chat completions stand-in")
+    ap.add_argument("--port", type=int, default=54330)
+    ap.add_argument("--latency-ms", type=float, default=300.0, help="Time to first token")
+    ap.add_argument("--tokens-per-sec", type=float, default=0.0, help="Token rate (0 = instant)")
+    ap.add_argument("--reply-tokens", type=int, default=60)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed")
+    ap.add_argument("--error-codes", default="429,500", help="Comma-separated statuses to inject")
+    ap.add_argument("--cut-rate", type=float, default=0.0, help="Fraction of streams dropped half way")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    Handler.latency = args.latency_ms / 1000
+    Handler.tokens_per_sec = args.tokens_per_sec
+    Handler.reply_tokens = args.reply_tokens
+    Handler.error_rate = args.error_rate
+    Handler.error_codes = tuple(int(c) for c in args.error_codes.split(",") if c)
+    Handler.cut_rate = args.cut_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"OpenAI stand-in on http://127.0.0.1:{args.port}/v1 (stats: /__stats)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+supabase-standin.py
+Minimal local stand-in for the Supabase PostgREST `tasks` endpoint, for
+exercising scripts/lib/task_helpers.py offline.
+
+Supports GET with eq./in. filters, POST (object or array body, with
+on_conflict=id + resolution=ignore-duplicates) and PATCH, on an in-memory
+table. Speaks HTTP/1.1 keep-alive and reports how many TCP
+connections and requests it served, so connection reuse is visible.
+
+Usage:
+  python3 supabase-standin.py [--port 54321] [--latency-ms 0] [--fail-rate 0]
+  SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=test python3 your-agent.py
+"""
+
+import argparse
+import csv
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TABLE = {}
+STATS = {"connections": 0, "requests": 0}
+LOCK = threading.Lock()
+
+
+def _match(row, filters):
+    for col, cond in filters.items():
+        val = str(row.get(col, ""))
+        if cond.startswith("eq."):
+            if val != cond[3:]:
+                return False
+        elif cond.startswith("in.(") and cond.endswith(")"):
+            values = next(csv.reader([cond[4:-1]], quotechar='"', escapechar="\\"), [])
+            if val not in values:
+                return False
+    return True
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    fail_rate = 0.0
+
+    def setup(self):
+        super().setup()
+        with LOCK:
+            STATS["connections"] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _parse(self):
+        u = urllib.parse.urlsplit(self.path)
+        table = u.path.rsplit("/", 1)[-1]
+        params = dict(urllib.parse.parse_qsl(u.query))
+        opts = {k: params.pop(k) for k in ("select", "limit", "order", "on_conflict") if k in params}
+        return table, params, opts
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n)) if n else None
+
+    def _send(self, status, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _begin(self):
+        with LOCK:
+            STATS["requests"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._body()
+            self._send(503, {"message": "injected failure"})
+            return False
+        return True
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            return self._send(200, {**STATS, "rows": len(TABLE)})
+        if not self._begin():
+            return
+        _, filters, opts = self._parse()
+        with LOCK:
+            rows = [r for r in TABLE.values() if _match(r, filters)]
+        if "limit" in opts:
+            rows = rows[: int(opts["limit"])]
+        self._send(200, rows)
+
+    def do_POST(self):
+        if not self._begin():
+            return
+        _, _, opts = self._parse()
+        ignore_dupes = "ignore-duplicates" in self.headers.get("Prefer", "")
+        body = self._body()
+        items = body if isinstance(body, list) else [body]
+        created = []
+        with LOCK:
+            for item in items:
+                row = {"id": item.get("id") or str(uuid.uuid4()), **item}
+                if row["id"] in TABLE:
+                    if ignore_dupes and opts.get("on_conflict") == "id":
+                        continue
+                    return self._send(409, {"message": "duplicate key value violates unique constraint"})
+                TABLE[row["id"]] = row
+                created.append(row)
+        if "return=representation" in self.headers.get("Prefer", ""):
+            self._send(201, created)
+        else:
+            self._send(201)
+
+    def do_PATCH(self):
+        if not self._begin():
+            return
+        _, filters, _ = self._parse()
+        body = self._body() or {}
+        with LOCK:
+            for row in TABLE.values():
+                if _match(row, filters):
+                    row.update(body)
+        self._send(204)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local Supabase tasks stand-in")
+    ap.add_argument("--port", type=int, default=54321)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    args = ap.parse_args()
+
+    Handler.latency = args.latency_ms / 1000
+    Handler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Supabase stand-in on http://127.0.0.1:{args.port} (stats: /__stats)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,21 @@ Persistent bot for the Amalfi AI automators community.
 Handles:
 - Welcome DM to new members
 - Q&A responses (when mentioned or in help channels)
-- Lead detection → Supabase + Telegram alert to Josh
+- Lead detection → Supabase + Telegram alert to Josh, via a background queue
+  so outbound HTTP never blocks the gateway (repeat leads from the same user
+  within LEAD_DEDUP_WINDOW are dropped unless the earlier one failed to store;
+  failed sends are retried a few times)
 - Runs 24/7 as com.amalfiai.discord-community-bot LaunchAgent
 """
 
 import discord
 import asyncio
 import os
-import json
-import subprocess
-import tempfile
-import urllib.request
 import urllib.parse
 import re
 import sys
+import time
+import random
 import signal
 import aiohttp
 from datetime import datetime, timezone
@@ -44,12 +45,21 @@ def load_env():
 
 ENV            = load_env()
 TOKEN          = ENV.get("DISCORD_BOT_TOKEN", "")
-SUPABASE_URL   = "https://afmpbtynucpbglwtbfuz.supabase.co"
+SUPABASE_URL   = os.environ.get("SUPABASE_URL", "https://afmpbtynucpbglwtbfuz.supabase.co")
+TELEGRAM_API   = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
 SUPABASE_KEY   = ENV.get("SUPABASE_SERVICE_ROLE_KEY", "")
 BOT_TOKEN_TG   = ENV.get("TELEGRAM_BOT_TOKEN", "")
 JOSH_CHAT_ID   = ENV.get("TELEGRAM_JOSH_CHAT_ID", "1140320036")
 MODEL          = "gpt-4o"
-OPENAI_COMPLETE = "/Users/henryburton/.openclaw/workspace-anthropic/scripts/lib/openai-complete.sh"
+OPENAI_KEY     = os.environ.get("OPENAI_API_KEY") or ENV.get("OPENAI_API_KEY", "")
+OPENAI_URL     = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/") + "/chat/completions"
+OPENAI_TIMEOUT = 60   # seconds per completion, including waiting for a pooled connection
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("DISCORD_OPENAI_CONNECTIONS", "8"))
+
+LEAD_DEDUP_WINDOW = 3600   # seconds — one lead per user per hour
+LEAD_RETRIES      = 3      # extra attempts per outbound call on 429/5xx/network errors
+LEAD_TIMEOUT      = 10     # seconds per outbound call
+LEAD_QUEUE_MAX    = 200
 
 # Channels where the bot responds to all messages (not just mentions)
 HELP_CHANNEL_PATTERNS = ["ask", "help", "question", "automat", "build"]
@@ -117,45 +127,96 @@ def has_lead_signal(content: str) -> bool:
     lower = content.lower()
     return any(kw in lower for kw in LEAD_KEYWORDS)
 
-def generate_response(user_message: str, username: str, context: str = "") -> str:
-    """Run Claude and return a response."""
+# One ClientSession for the life of the bot: keep-alive connections to the
+# API are reused across replies, and a burst of messages waits on the
+# connector's pool instead of tying up executor threads.
+_http = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=OPENAI_MAX_CONNECTIONS, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=OPENAI_TIMEOUT, connect=10),
+        )
+    return _http
+
+# Lead posts get their own small session, so a burst of replies holding every
+# completion connection cannot delay a lead, and vice versa.
+_lead_http = None
+
+def get_lead_session() -> aiohttp.ClientSession:
+    global _lead_http
+    if _lead_http is None or _lead_http.closed:
+        _lead_http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=LEAD_TIMEOUT),
+        )
+    return _lead_http
+
+async def close_http_session():
+    global _http, _lead_http
+    for session in (_http, _lead_http):
+        if session is not None and not session.closed:
+            await session.close()
+    _http = _lead_http = None
+
+async def generate_response(user_message: str, username: str, context: str = "") -> str:
+    """Ask the model for a reply and return it."""
     prompt = f"{ALEX_SYSTEM}\n\n---\n\nCommunity member {username} says:\n{user_message}"
     if context:
         prompt += f"\n\nContext: {context}"
 
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, prefix='/tmp/discord-prompt-') as f:
-            f.write(prompt)
-            tmp = f.name
-
-        env = os.environ.copy()
-        env['PATH'] = '/opt/homebrew/bin:/usr/local/bin:' + env.get('PATH', '')
-        env.pop('CLAUDECODE', None)
-        env['OPENAI_API_KEY'] = env.get('OPENAI_API_KEY') or ENV.get('OPENAI_API_KEY', '')
-
-        result = subprocess.run(
-            ['bash', OPENAI_COMPLETE, '--model', MODEL],
-            stdin=open(tmp),
-            capture_output=True,
-            text=True,
-            timeout=60,
-            env=env,
-        )
-        os.unlink(tmp)
+    payload = {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+    }
+    headers = {"Authorization": f"Bearer {OPENAI_KEY}", "Content-Type": "application/json"}
 
-        response = result.stdout.strip()
+    try:
+        async with get_http_session().post(OPENAI_URL, json=payload, headers=headers) as resp:
+            if resp.status != 200:
+                body = await resp.text()
+                print(f"[openai] HTTP {resp.status}: {body[:300]}", file=sys.stderr)
+                return "One sec — let me think on that properly. Try me again in a moment."
+            data = await resp.json()
+
+        response = (data["choices"][0]["message"].get("content") or "").strip()
         if not response:
             return "One sec — let me think on that properly. Try me again in a moment."
         return response[:1800]  # Discord 2000 char limit
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         return "Took too long to think on that one. Try breaking the question down a bit."
     except Exception as e:
-        print(f"[claude] Error: {e}", file=sys.stderr)
+        print(f"[openai] Error: {e}", file=sys.stderr)
         return "Hit a snag on my end. Try again in a moment."
 
-def create_supabase_lead(username: str, user_id: str, message: str, channel: str):
-    """Insert a lead record into Supabase."""
-    data = json.dumps({
+async def _post_with_retry(label: str, url: str, payload: dict, headers: dict) -> bool:
+    """POST JSON, retrying 429/5xx and network errors with jittered backoff."""
+    for attempt in range(LEAD_RETRIES + 1):
+        try:
+            async with get_lead_session().post(url, json=payload, headers=headers) as resp:
+                if resp.status < 300:
+                    return True
+                body = await resp.text()
+                if resp.status != 429 and resp.status < 500:
+                    print(f"[{label}] HTTP {resp.status}: {body[:200]}", file=sys.stderr)
+                    return False
+                error = f"HTTP {resp.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = f"{type(e).__name__}: {e}"
+        if attempt < LEAD_RETRIES:
+            delay = random.uniform(0, 2 ** (attempt + 1))
+            print(f"[{label}] {error} — retry {attempt + 1}/{LEAD_RETRIES} in {delay:.1f}s", file=sys.stderr)
+            await asyncio.sleep(delay)
+    print(f"[{label}] giving up after {LEAD_RETRIES + 1} attempts: {error}", file=sys.stderr)
+    return False
+
+async def create_supabase_lead(username: str, user_id: str, message: str, channel: str,
+                               detected_at: str) -> bool:
+    """Insert a lead record into Supabase. Returns True once it is stored."""
+    data = {
         "source": "discord",
         "status": "new",
         "notes": f"Discord lead — @{username} in #{channel}:\n{message[:500]}",
@@ -163,27 +224,21 @@ def create_supabase_lead(username: str, user_id: str, message: str, channel: str
             "discord_user": username,
             "discord_id": str(user_id),
             "channel": channel,
-            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "detected_at": detected_at,
         }
-    }).encode()
-    req = urllib.request.Request(
-        f"{SUPABASE_URL}/rest/v1/leads",
-        data=data,
-        headers={
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal",
-        },
-        method="POST",
-    )
-    try:
-        urllib.request.urlopen(req, timeout=10)
+    }
+    headers = {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Content-Type": "application/json",
+        "Prefer": "return=minimal",
+    }
+    if await _post_with_retry("lead", f"{SUPABASE_URL}/rest/v1/leads", data, headers):
         print(f"[lead] Created lead for @{username}")
-    except Exception as e:
-        print(f"[lead] Supabase insert failed: {e}", file=sys.stderr)
+        return True
+    return False
 
-def send_telegram_lead_alert(username: str, message: str, channel: str):
+async def send_telegram_lead_alert(username: str, message: str, channel: str):
     """Notify Josh on Telegram about a lead."""
     text = (
         f"🎯 <b>Discord lead</b>\n"
@@ -191,21 +246,70 @@ def send_telegram_lead_alert(username: str, message: str, channel: str):
         f"{message[:400]}\n\n"
         f"<i>Flagged as mentorship interest.</i>"
     )
-    data = json.dumps({
+    data = {
         "chat_id": JOSH_CHAT_ID,
         "text": text,
         "parse_mode": "HTML",
-    }).encode()
-    req = urllib.request.Request(
-        f"https://api.telegram.org/bot{BOT_TOKEN_TG}/sendMessage",
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    }
+    await _post_with_retry("telegram", f"{TELEGRAM_API}/bot{BOT_TOKEN_TG}/sendMessage", data,
+                           {"Content-Type": "application/json"})
+
+# ── Lead pipeline ─────────────────────────────────────────────────────────────
+# on_message only enqueues; a single worker does the Supabase insert and the
+# Telegram alert, so a slow API never stalls the gateway or heartbeats.
+
+_lead_queue = None
+_lead_seen = {}   # discord user id -> monotonic time of their last queued lead (cleared if it fails)
+
+def enqueue_lead(username: str, user_id, message: str, channel: str) -> bool:
+    """Queue a lead unless this user already had one inside LEAD_DEDUP_WINDOW."""
+    global _lead_queue
+    if _lead_queue is None:
+        _lead_queue = asyncio.Queue(maxsize=LEAD_QUEUE_MAX)
+    now = time.monotonic()
+    last = _lead_seen.get(user_id)
+    if last is not None and now - last < LEAD_DEDUP_WINDOW:
+        print(f"[lead] Duplicate from @{username} within {LEAD_DEDUP_WINDOW}s — skipped")
+        return False
+    if len(_lead_seen) > 10000:
+        for uid, t in list(_lead_seen.items()):
+            if now - t >= LEAD_DEDUP_WINDOW:
+                del _lead_seen[uid]
     try:
-        urllib.request.urlopen(req, timeout=10)
-    except Exception as e:
-        print(f"[telegram] Alert failed: {e}", file=sys.stderr)
+        _lead_queue.put_nowait((username, user_id, message, channel,
+                                datetime.now(timezone.utc).isoformat()))
+    except asyncio.QueueFull:
+        print(f"[lead] Queue full — dropped lead from @{username}", file=sys.stderr)
+        return False
+    _lead_seen[user_id] = now
+    return True
+
+async def lead_worker():
+    global _lead_queue
+    if _lead_queue is None:
+        _lead_queue = asyncio.Queue(maxsize=LEAD_QUEUE_MAX)
+    while True:
+        username, user_id, message, channel, detected_at = await _lead_queue.get()
+        created = False
+        try:
+            created, _ = await asyncio.gather(
+                create_supabase_lead(username, user_id, message, channel, detected_at),
+                send_telegram_lead_alert(username, message, channel),
+            )
+        except Exception as e:
+            print(f"[lead] Pipeline error for @{username}: {e}", file=sys.stderr)
+        finally:
+            if not created:
+                _lead_seen.pop(user_id, None)  # not stored — let their next message try again
+            _lead_queue.task_done()
+
+async def drain_leads(timeout: float = 15):
+    """Give queued leads a chance to go out before shutdown."""
+    if _lead_queue is not None and not _lead_queue.empty():
+        try:
+            await asyncio.wait_for(_lead_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[lead] {_lead_queue.qsize()} lead(s) still queued at shutdown", file=sys.stderr)
 
 # ── Event handlers ────────────────────────────────────────────────────────────
 
@@ -246,8 +350,7 @@ async def on_message(message: discord.Message):
     # Lead detection — runs on all messages
     if has_lead_signal(content):
         print(f"[lead] Signal from @{username} in #{channel.name}")
-        create_supabase_lead(username, message.author.id, content, channel.name)
-        send_telegram_lead_alert(username, content, channel.name)
+        enqueue_lead(username, message.author.id, content, channel.name)
 
     # Decide whether to respond
     mentioned   = client.user in message.mentions
@@ -263,10 +366,7 @@ async def on_message(message: discord.Message):
         clean = "Hey"
 
     async with channel.typing():
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None, generate_response, clean, username
-        )
+        response = await generate_response(clean, username)
 
     await message.reply(response, mention_author=False)
     print(f"[reply] Responded to @{username} in #{channel.name}")
@@ -292,10 +392,6 @@ async def wait_for_network(host: str = "discord.com", port: int = 443):
 
 # ── Entry point ───────────────────────────────────────────────────────────────
 
-if not TOKEN:
-    print("ERROR: DISCORD_BOT_TOKEN not set in .env.scheduler", file=sys.stderr)
-    sys.exit(1)
-
 async def main():
     loop = asyncio.get_running_loop()
 
@@ -313,7 +409,17 @@ async def main():
     # launches at boot before the network stack is ready.
     await wait_for_network()
 
-    async with client:
-        await client.start(TOKEN)
-
-asyncio.run(main())
+    worker = asyncio.create_task(lead_worker())
+    try:
+        async with client:
+            await client.start(TOKEN)
+    finally:
+        await drain_leads()
+        worker.cancel()
+        await close_http_session()
+
+if __name__ == "__main__":
+    if not TOKEN:
+        print("ERROR: DISCORD_BOT_TOKEN not set in .env.scheduler", file=sys.stderr)
+        sys.exit(1)
+    asyncio.run(main())
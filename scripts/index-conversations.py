@@ -4,12 +4,39 @@ index-conversations.py
 Converts Claude Code .jsonl conversation files to searchable markdown,
 then adds them as a qmd collection for on-demand querying.
 
+Conversion is incremental: a state file in OUTPUT_DIR records, per session,
+the byte offset already consumed plus the size, mtime and a hash of the last
+consumed bytes. Each run only parses lines appended since the previous run
+and appends the new turns to the existing markdown. A session whose file was
+truncated or rewritten is re-parsed from the start. The state also records
+the markdown's size, and an append first truncates the file back to it, so
+turns written by a run that was interrupted before saving its state are not
+duplicated.
+
+qmd is only touched when the markdown corpus actually changed: a manifest of
+per-file content hashes is diffed after conversion, and `qmd update` plus a
+background `qmd embed` run only if files were added, changed or removed. The
+embed job holds a lock file so overlapping runs never stack embed processes.
+
+Converted turns are also written to a local SQLite FTS5 index next to
+OUTPUT_DIR (conversations-fts.db), so history can be searched without
+starting qmd. Agents can open that database directly:
+  SELECT session_id, snippet(turns, 2, '[', ']', '…', 12) FROM turns
+  WHERE turns MATCH ? ORDER BY bm25(turns) LIMIT 10
+
 Usage:
-  python3 index-conversations.py [--rebuild]
+  python3 index-conversations.py [--rebuild] [--jobs N]
+  python3 index-conversations.py --query "search terms" [--limit N] [--json]
+
+  --jobs N   convert files across N worker processes (0 = one per core)
+  --query    ranked session ids + snippets from the local FTS index
 """
 
+import fcntl
 import json
 import os
+import re
+import sqlite3
 import sys
 import subprocess
 import hashlib
@@ -20,26 +47,85 @@ PROJECTS_DIR = Path.home() / ".claude/projects/-Users-henryburton"
 ARCHIVE_DIR  = PROJECTS_DIR / "archive"
 OUTPUT_DIR   = Path.home() / ".claude/conversations-md"
 COLLECTION   = "claude-conversations"
+STATE_FILE   = OUTPUT_DIR / ".index-state.json"
+HASH_WINDOW  = 4096  # bytes before the saved offset that must still match
+MANIFEST     = OUTPUT_DIR / ".qmd-manifest.json"
+EMBED_LOCK   = OUTPUT_DIR / ".qmd-embed.lock"
+EMBED_FLAG   = OUTPUT_DIR / ".qmd-embed.pending"
+FTS_DB       = OUTPUT_DIR.parent / "conversations-fts.db"
 
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Optional faster JSON backend — orjson, then pysimdjson, else stdlib
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import simdjson
+        _loads = simdjson.loads
+        JSON_BACKEND = "simdjson"
+    except ImportError:
+        _loads = json.loads
+        JSON_BACKEND = "json"
+
+# Pre-filters run on the raw bytes so most lines are dropped without decoding.
+# Claude Code writes compact JSON; quotes inside JSON strings are escaped, so
+# these markers only match real keys/values. Plain substring search is used
+# because it is several times faster than a regex scan over large tool output.
+_TURN_MARKERS   = (b'"type":"user"', b'"type":"assistant"')
+_TOOL_RESULT    = b'"type":"tool_result"'
+_TEXT_BLOCK     = b'"type":"text"'
+_TURN_TYPE_RE   = re.compile(rb'"type"\s*:\s*"(?:user|assistant)"')  # non-compact writers
+_TAG_BLOCK_RE   = re.compile(r"<[^>]+>.*?</[^>]+>", re.DOTALL)
+
+
+def _decode(raw: bytes):
+    try:
+        return _loads(raw)
+    except ValueError:
+        # Fast backends reject invalid UTF-8; fall back to the lenient path
+        return json.loads(raw.decode("utf-8", errors="ignore"))
+
+
+def _is_candidate(raw: bytes) -> bool:
+    """Cheap check that a line can yield a turn: right type, not tool-result-only."""
+    if _TURN_MARKERS[0] in raw or _TURN_MARKERS[1] in raw:
+        return _TOOL_RESULT not in raw or _TEXT_BLOCK in raw
+    if b'"type": ' in raw:
+        return bool(_TURN_TYPE_RE.search(raw))
+    return False
+
+
+def extract_conversation(jsonl_path: Path, start: int = 0) -> dict:
+    """Extract human/assistant text turns from a JSONL conversation file.
 
-def extract_conversation(jsonl_path: Path) -> dict:
-    """Extract human/assistant text turns from a JSONL conversation file."""
+    Parsing begins at byte offset `start` and stops after the last complete
+    line, so a half-written trailing record is picked up on the next run.
+    The returned "offset" is where the next incremental parse should resume.
+    """
     turns = []
     session_id = jsonl_path.stem
     cwd = ""
     ts_first = None
+    offset = start
 
     try:
-        with open(jsonl_path, encoding="utf-8", errors="ignore") as f:
+        with open(jsonl_path, "rb") as f:
+            f.seek(start)
             for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                offset += len(raw)
                 raw = raw.strip()
-                if not raw:
+                if not raw or not _is_candidate(raw):
                     continue
                 try:
-                    d = json.loads(raw)
-                except json.JSONDecodeError:
+                    d = _decode(raw)
+                except ValueError:
+                    continue
+                if not isinstance(d, dict):
                     continue
 
                 t = d.get("type")
@@ -69,8 +155,7 @@ def extract_conversation(jsonl_path: Path) -> dict:
                 text = text.strip()
                 if not text or text.startswith("<system-reminder>") or text.startswith("<local-command"):
                     # Try to get the actual user text after tags
-                    import re
-                    clean = re.sub(r"<[^>]+>.*?</[^>]+>", "", text, flags=re.DOTALL).strip()
+                    clean = _TAG_BLOCK_RE.sub("", text).strip()
                     if not clean:
                         continue
                     text = clean
@@ -100,9 +185,23 @@ def extract_conversation(jsonl_path: Path) -> dict:
         "turns": turns,
         "cwd": cwd,
         "ts": ts_first,
+        "offset": offset,
     }
 
 
+def _turn_lines(turns: list) -> list:
+    lines = []
+    for turn in turns:
+        prefix = "**Josh:**" if turn["role"] == "user" else "**Claude:**"
+        # Truncate very long turns
+        text = turn["text"]
+        if len(text) > 1500:
+            text = text[:1500] + "…"
+        lines.append(f"{prefix} {text}")
+        lines.append("")
+    return lines
+
+
 def to_markdown(conv: dict) -> str:
     """Convert extracted conversation to markdown for indexing."""
     lines = []
@@ -114,45 +213,183 @@ def to_markdown(conv: dict) -> str:
         lines.append(f"**Working dir:** `{conv['cwd']}`")
     lines.append("")
 
-    for turn in conv["turns"]:
-        prefix = "**Josh:**" if turn["role"] == "user" else "**Claude:**"
-        # Truncate very long turns
-        text = turn["text"]
-        if len(text) > 1500:
-            text = text[:1500] + "…"
-        lines.append(f"{prefix} {text}")
-        lines.append("")
+    lines.extend(_turn_lines(conv["turns"]))
 
     return "\n".join(lines)
 
 
-def process_jsonl_files():
-    """Find all jsonl files (active + archive) and convert them."""
-    jsonl_files = list(PROJECTS_DIR.glob("*.jsonl")) + list(ARCHIVE_DIR.glob("*.jsonl"))
-    print(f"Found {len(jsonl_files)} conversation files")
+def to_markdown_append(turns: list) -> str:
+    """Markdown for turns appended to an existing file (matches to_markdown spacing)."""
+    return "\n" + "\n".join(_turn_lines(turns))
 
-    converted = 0
-    skipped = 0
 
-    for jf in sorted(jsonl_files):
-        out_path = OUTPUT_DIR / (jf.stem + ".md")
+# ── Incremental state ─────────────────────────────────────────────────────────
 
-        # Skip already converted (unless --rebuild)
-        if "--rebuild" not in sys.argv and out_path.exists():
-            skipped += 1
-            continue
+def load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
+
+def _window_hash(jsonl_path: Path, offset: int) -> str:
+    """Hash of the HASH_WINDOW bytes ending at `offset` — detects rewrites cheaply."""
+    begin = max(0, offset - HASH_WINDOW)
+    with open(jsonl_path, "rb") as f:
+        f.seek(begin)
+        return hashlib.sha1(f.read(offset - begin)).hexdigest()
+
+
+def _resume_offset(jf: Path, entry: dict, st: os.stat_result, out_path: Path) -> int:
+    """Byte offset to resume from, 0 to re-parse, or -1 if nothing changed."""
+    if not entry or (entry.get("turns") and not out_path.exists()):
+        return 0
+    offset = entry.get("offset", 0)
+    if st.st_size == entry.get("size") and st.st_mtime == entry.get("mtime"):
+        return -1
+    if st.st_size < offset:
+        return 0  # truncated
+    try:
+        if _window_hash(jf, offset) != entry.get("hash"):
+            return 0  # rewritten in place
+    except OSError:
+        return 0
+    return offset
 
-        conv = extract_conversation(jf)
 
-        if not conv["turns"]:
-            skipped += 1
-            continue
+def convert_file(jf: Path, entry: dict):
+    """Convert one session file. Runs in the main process or a pool worker.
+
+    Returns (session_id, new_state_entry, conv). new_state_entry and conv are
+    None when the file is unchanged since the last run; conv["reset"] is True
+    when the session was parsed from the start rather than appended to.
+    """
+    out_path = OUTPUT_DIR / (jf.stem + ".md")
+    try:
+        st = jf.stat()
+    except OSError:
+        return jf.stem, None, None
+
+    start = _resume_offset(jf, entry, st, out_path)
+    if start < 0:
+        return jf.stem, None, None
+    if start == 0:
+        entry = None
+
+    conv = extract_conversation(jf, start)
+    conv["reset"] = start == 0
+    prev_turns = entry.get("turns", 0) if entry else 0
+    md_size = entry.get("md_size") if entry else None
+
+    if conv["turns"]:
+        if prev_turns:
+            with open(out_path, "ab") as f:
+                # Drop turns appended by an earlier run that never saved its state
+                if md_size is not None and f.seek(0, os.SEEK_END) > md_size:
+                    f.truncate(md_size)
+                f.write(to_markdown_append(conv["turns"]).encode("utf-8"))
+        else:
+            # Header fields may have been seen in an earlier run with no kept turns
+            if entry:
+                conv["cwd"] = conv["cwd"] or entry.get("cwd", "")
+                if entry.get("ts") and not conv["ts"]:
+                    conv["ts"] = datetime.fromisoformat(entry["ts"])
+            out_path.write_text(to_markdown(conv), encoding="utf-8")
+        md_size = out_path.stat().st_size
+
+    ts = conv["ts"].isoformat() if conv["ts"] else (entry or {}).get("ts")
+    new_entry = {
+        "offset": conv["offset"],
+        "size":   st.st_size,
+        "mtime":  st.st_mtime,
+        "hash":   _window_hash(jf, conv["offset"]),
+        "turns":  prev_turns + len(conv["turns"]),
+        "cwd":    (entry or {}).get("cwd") or conv["cwd"],
+        "ts":     (entry or {}).get("ts") or ts,
+        "md_size": md_size,
+    }
+    return jf.stem, new_entry, conv
+
+
+def _convert_args(args):
+    return convert_file(*args)
+
+
+def _arg_value(flag: str, default=None):
+    for i, arg in enumerate(sys.argv):
+        if arg == flag and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(flag + "="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def _jobs_arg() -> int:
+    """--jobs N / --jobs=N; 0 means one worker per core. Default 1 (serial)."""
+    val = _arg_value("--jobs")
+    if val is None:
+        return 1
+    try:
+        n = int(val)
+    except ValueError:
+        print(f"Invalid --jobs value: {val}", file=sys.stderr)
+        sys.exit(2)
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def process_jsonl_files(jobs: int = 1):
+    """Find all jsonl files (active + archive) and convert new content.
+
+    With jobs > 1, extraction and markdown writing are spread over a process
+    pool. Results stream back in input order so logging and the saved state
+    are identical to a serial run.
+    """
+    jsonl_files = sorted(list(PROJECTS_DIR.glob("*.jsonl")) + list(ARCHIVE_DIR.glob("*.jsonl")))
+    print(f"Found {len(jsonl_files)} conversation files")
+
+    rebuild = "--rebuild" in sys.argv or not FTS_DB.exists()
+    state = {} if rebuild else load_state()
+    db = open_fts()
+    if rebuild:
+        db.execute("DELETE FROM turns")
+        db.execute("DELETE FROM sessions")
+    converted = 0
+    skipped = 0
 
-        md = to_markdown(conv)
-        out_path.write_text(md, encoding="utf-8")
-        converted += 1
-        print(f"  Converted: {jf.name} ({len(conv['turns'])} turns)")
+    work = [(jf, state.get(jf.stem)) for jf in jsonl_files]
+    if jobs > 1 and len(work) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        print(f"Converting with {jobs} workers")
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(_convert_args, work, chunksize=max(1, len(work) // (jobs * 8)))
+    else:
+        pool = None
+        results = map(_convert_args, work)
 
+    try:
+        for (jf, _), (stem, new_entry, conv) in zip(work, results):
+            if new_entry is not None:
+                state[stem] = new_entry
+                fts_add(db, stem, new_entry, conv)
+            if conv and conv["turns"]:
+                converted += 1
+                print(f"  Converted: {jf.name} (+{len(conv['turns'])} turns)")
+            else:
+                skipped += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Index first, then state — state must never run ahead of the index
+    db.commit()
+    db.close()
+    save_state(state)
     print(f"\nDone: {converted} converted, {skipped} skipped")
     return converted
 
@@ -176,15 +413,191 @@ def setup_qmd_collection():
         subprocess.run(["qmd", "update"], check=False)
 
 
+# ── Local full-text index ─────────────────────────────────────────────────────
+
+def open_fts(path: Path = FTS_DB) -> sqlite3.Connection:
+    db = sqlite3.connect(str(path))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS turns USING fts5("
+        "session_id UNINDEXED, role UNINDEXED, text, tokenize='porter unicode61')"
+    )
+    db.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, ts TEXT, cwd TEXT)")
+    if "turns" not in {row[1] for row in db.execute("PRAGMA table_info(sessions)")}:
+        db.execute("ALTER TABLE sessions ADD COLUMN turns INTEGER")
+    return db
+
+
+def fts_add(db: sqlite3.Connection, session_id: str, entry: dict, conv: dict):
+    """Index new turns for a session; a reset session is replaced wholesale.
+
+    sessions.turns is committed with the rows, so turns indexed by a run that
+    died before saving its state are recognised and dropped before re-adding.
+    """
+    if conv["reset"]:
+        db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+    else:
+        row = db.execute("SELECT turns FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        extra = (row[0] or 0) - (entry["turns"] - len(conv["turns"])) if row else 0
+        if extra > 0:
+            db.execute(
+                "DELETE FROM turns WHERE rowid IN (SELECT rowid FROM turns WHERE session_id = ? "
+                "ORDER BY rowid DESC LIMIT ?)",
+                (session_id, extra),
+            )
+    db.executemany(
+        "INSERT INTO turns (session_id, role, text) VALUES (?, ?, ?)",
+        [(session_id, t["role"], t["text"]) for t in conv["turns"]],
+    )
+    db.execute(
+        "INSERT OR REPLACE INTO sessions (session_id, ts, cwd, turns) VALUES (?, ?, ?, ?)",
+        (session_id, entry.get("ts"), entry.get("cwd"), entry["turns"]),
+    )
+
+
+def _fts_match(query: str, op: str) -> str:
+    # Quote every term so free text never trips FTS5 query syntax
+    terms = re.findall(r"\w+", query)
+    return f" {op} ".join(f'"{t}"' for t in terms)
+
+
+def search_conversations(query: str, limit: int = 10, path: Path = FTS_DB) -> list:
+    """Ranked sessions for a free-text query: [{session_id, ts, cwd, snippet, score}].
+
+    All terms must match; if nothing does, any term may match.
+    """
+    if not path.exists() or not re.search(r"\w", query):
+        return []
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = []
+        for op in ("AND", "OR"):
+            rows = db.execute(
+                "SELECT t.session_id, s.ts, s.cwd,"
+                " snippet(turns, 2, '[', ']', '…', 12), bm25(turns) AS score"
+                " FROM turns t LEFT JOIN sessions s ON s.session_id = t.session_id"
+                " WHERE turns MATCH ? ORDER BY score LIMIT ?",
+                (_fts_match(query, op), limit * 20),
+            ).fetchall()
+            if rows:
+                break
+    finally:
+        db.close()
+
+    # Best-scoring turn per session, sessions in rank order
+    results, seen = [], set()
+    for session_id, ts, cwd, snippet, score in rows:
+        if session_id in seen:
+            continue
+        seen.add(session_id)
+        results.append({"session_id": session_id, "ts": ts, "cwd": cwd,
+                        "snippet": snippet, "score": round(-score, 3)})
+        if len(results) >= limit:
+            break
+    return results
+
+
+def query_main():
+    query = _arg_value("--query", "")
+    limit = int(_arg_value("--limit", "10"))
+    results = search_conversations(query, limit)
+    if "--json" in sys.argv:
+        print(json.dumps(results, ensure_ascii=False))
+        return
+    if not results:
+        print("No matches.")
+        return
+    for r in results:
+        date = (r["ts"] or "")[:10] or "unknown date"
+        print(f"{r['session_id']}  {date}  score={r['score']}")
+        print(f"    {r['snippet']}")
+
+
+# ── qmd change manifest + embed lock ──────────────────────────────────────────
+
+def diff_manifest():
+    """Compare markdown files against the manifest.
+
+    Returns (changed, removed, manifest) where manifest is the updated mapping
+    to save once qmd has been updated. Files whose size and mtime match the
+    manifest are not re-hashed.
+    """
+    try:
+        old = json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        old = {}
+
+    manifest, changed = {}, []
+    for md in OUTPUT_DIR.glob("*.md"):
+        st = md.stat()
+        prev = old.get(md.name)
+        if prev and prev["size"] == st.st_size and prev["mtime"] == st.st_mtime:
+            manifest[md.name] = prev
+            continue
+        digest = hashlib.sha1(md.read_bytes()).hexdigest()
+        manifest[md.name] = {"hash": digest, "size": st.st_size, "mtime": st.st_mtime}
+        if not prev or prev["hash"] != digest:
+            changed.append(md.name)
+
+    removed = [name for name in old if name not in manifest]
+    return sorted(changed), removed, manifest
+
+
+def save_manifest(manifest: dict):
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, MANIFEST)
+
+
+def queue_embed():
+    """Flag that embeddings are stale and start a worker unless one is running."""
+    EMBED_FLAG.touch()
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--embed-worker"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def embed_worker():
+    """Run `qmd embed` under an exclusive lock until no embed is pending.
+
+    A second worker exits immediately if the lock is held; the pending flag it
+    leaves behind is picked up by the running worker before it exits.
+    """
+    while EMBED_FLAG.exists():
+        with open(EMBED_LOCK, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # another worker owns the lock and will see the flag
+            lock.write(str(os.getpid()))
+            lock.flush()
+            while EMBED_FLAG.exists():
+                EMBED_FLAG.unlink()
+                subprocess.run(["qmd", "embed"], check=False)
+
+
 if __name__ == "__main__":
+    if "--embed-worker" in sys.argv:
+        embed_worker()
+        sys.exit(0)
+    if "--query" in sys.argv or any(a.startswith("--query=") for a in sys.argv):
+        query_main()
+        sys.exit(0)
+
     print(f"Output dir: {OUTPUT_DIR}")
-    converted = process_jsonl_files()
-    if converted > 0 or "--rebuild" in sys.argv:
-        print("\nIndexing into qmd...")
+    process_jsonl_files(jobs=_jobs_arg())
+    changed, removed, manifest = diff_manifest()
+    if changed or removed:
+        print(f"\nIndexing into qmd ({len(changed)} changed, {len(removed)} removed)...")
         setup_qmd_collection()
+        save_manifest(manifest)
         print("\nDone. Query with: qmd query \"your question\"")
-        # Run embed in background so new docs get vectors
-        subprocess.Popen(["qmd", "embed"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Embed in background so new docs get vectors — one worker at a time
+        queue_embed()
         print("Embedding queued in background.")
     else:
-        print("Nothing new to index. Use --rebuild to reindex all.")
+        save_manifest(manifest)
+        print("Markdown corpus unchanged — skipping qmd update and embed.")
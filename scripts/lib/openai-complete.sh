@@ -5,6 +5,7 @@
 #   echo "user message" | openai-complete.sh [--model gpt-4o] [--system "text"] [--system-file /path]
 #
 # Reads OPENAI_API_KEY from environment. Returns completion text on stdout.
+# Uses the warm openai-complete-daemon.py when it is running (openai_client.py).
 
 set -uo pipefail
 export PATH="/opt/homebrew/bin:/usr/local/bin:$PATH"
@@ -35,8 +36,12 @@ export _OAI_MODEL="$MODEL"
 export _OAI_SYSTEM="$SYSTEM_PROMPT"
 export _OAI_USER="$USER_CONTENT"
 
+export _OAI_LIB="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
 python3 - <<'PY'
-import json, urllib.request, os, sys
+import os, sys
+sys.path.insert(0, os.environ['_OAI_LIB'])
+from openai_client import chat, OpenAIError
 
 api_key = os.environ.get('_OAI_KEY', '')
 model   = os.environ.get('_OAI_MODEL', 'gpt-4o-mini')
@@ -52,29 +57,10 @@ if system:
     messages.append({'role': 'system', 'content': system})
 messages.append({'role': 'user', 'content': user})
 
-payload = json.dumps({
-    'model': model,
-    'messages': messages,
-    'temperature': 0.7,
-}).encode()
-
-req = urllib.request.Request(
-    'https://api.openai.com/v1/chat/completions',
-    data=payload,
-    headers={
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-    }
-)
-
 try:
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        data = json.loads(resp.read())
-        text = data['choices'][0]['message']['content']
-        print(text, end='')
-except urllib.error.HTTPError as e:
-    body = e.read().decode()
-    print(f"[openai-complete] HTTP {e.code}: {body}", file=sys.stderr)
+    print(chat(messages, model=model, temperature=0.7, api_key=api_key), end='')
+except OpenAIError as e:
+    print(f"[openai-complete] {e}", file=sys.stderr)
     sys.exit(1)
 except Exception as e:
     print(f"[openai-complete] error: {e}", file=sys.stderr)
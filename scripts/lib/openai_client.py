@@ -0,0 +1,370 @@
+"""
+scripts/lib/openai_client.py
+Chat completions through the local completion daemon, with a direct fallback.
+
+Usage in any agent script:
+    import sys
+    sys.path.insert(0, '/Users/henryburton/.openclaw/workspace-anthropic/scripts/lib')
+    from openai_client import chat, OpenAIError
+
+    text = chat([{"role": "user", "content": "hi"}], model="gpt-4o-mini")
+
+openai-complete-daemon.py (LaunchAgent com.amalfiai.openai-complete-daemon)
+keeps warm keep-alive connections to the API and listens on a Unix socket at
+$AOS_ROOT/tmp/openai-complete.sock (OPENAI_DAEMON_SOCK overrides). When it is
+reachable a call costs one local round trip plus the API time. When it is not,
+the request goes straight to the API with urllib — no openai SDK import
+either way. OPENAI_BASE_URL overrides the API endpoint (e.g. a local mock).
+
+Protocol: one JSON object per line in each direction. The request is a chat
+completions body plus an optional "api_key"; the reply is
+{"ok": true, "content": "..."} or {"ok": false, "status": 429, "error": "..."}.
+With "stream": true the daemon relays {"delta": "..."} lines as tokens arrive
+and finishes with {"ok": true, "done": true, "finish_reason": "..."}.
+
+stream() yields text deltas either way. If the stream ends without the API's
+[DONE] marker it raises StreamCutOff, so callers can tell a partial reply
+from a complete one.
+
+complete() and chat() retry transport errors, 429 and 5xx up to `retries`
+times (default 2) with full-jitter exponential backoff, as the openai SDK
+does. Any failure, including an unparseable reply, surfaces as OpenAIError.
+"""
+
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+_WS = os.environ.get("AOS_ROOT", "/Users/henryburton/.openclaw/workspace-anthropic")
+SOCKET_PATH = os.environ.get("OPENAI_DAEMON_SOCK", f"{_WS}/tmp/openai-complete.sock")
+API_BASE = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+RETRIES = 2
+BACKOFF_CAP = 30.0
+
+
+class OpenAIError(Exception):
+    """Completion failed. status is the HTTP status, or 0 for transport errors."""
+
+    def __init__(self, message, status=0):
+        super().__init__(message)
+        self.status = status
+
+
+class StreamCutOff(OpenAIError):
+    """A streamed completion ended before the API said it was done."""
+
+
+def retryable(err):
+    """True for failures worth another attempt: transport errors, 429 and 5xx."""
+    return err.status == 0 or err.status == 429 or err.status >= 500
+
+
+def backoff_delay(attempt):
+    """Seconds to wait before retry number `attempt` (1-based), full jitter."""
+    return random.uniform(0, min(BACKOFF_CAP, 2.0 ** attempt))
+
+
+def sse_deltas(lines):
+    """Parse chat-completion SSE lines (bytes) into (delta_text, finish_reason) pairs.
+
+    Returns normally only after "data: [DONE]"; raises StreamCutOff if the
+    lines run out first.
+    """
+    for raw in lines:
+        line = raw.strip()
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return
+        try:
+            choice = json.loads(data)["choices"][0]
+            text = (choice.get("delta") or {}).get("content") or ""
+            finish = choice.get("finish_reason")
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            continue
+        yield text, finish
+    raise StreamCutOff("stream ended before [DONE]")
+
+
+def build_payload(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=None, **extra):
+    payload = {"model": model, "messages": messages, "temperature": temperature}
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+    payload.update(extra)
+    return payload
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to the API host, shared between threads."""
+
+    _RETRYABLE = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                  ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, base_url=API_BASE, max_idle=8, timeout=120):
+        u = urllib.parse.urlsplit(base_url)
+        self.https = u.scheme == "https"
+        self.host = u.hostname
+        self.port = u.port
+        self.prefix = u.path.rstrip("/")
+        self.idle = queue.LifoQueue(maxsize=max_idle)
+        self.timeout = timeout
+        self.opened = 0
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.opened += 1
+            return cls(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn):
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def post(self, path, body, headers):
+        """(status, body_bytes); a stale reused connection is retried once."""
+        for attempt in (0, 1):
+            conn = self._acquire()
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", self.prefix + path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except self._RETRYABLE:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            self.finish(conn, resp)
+            return resp.status, data
+
+    def open_stream(self, path, body, headers):
+        """Send the request and return (conn, resp) with the body still unread."""
+        for attempt in (0, 1):
+            conn = self._acquire()
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", self.prefix + path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except self._RETRYABLE:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+    def finish(self, conn, resp, clean = True):
+        """Return a fully read connection to the pool, or close it."""
+        if clean and not resp.will_close:
+            self._release(conn)
+        else:
+            conn.close()
+
+
+def _via_daemon(payload, api_key, timeout, socket_path=SOCKET_PATH):
+    """Reply dict from the daemon, or None if it is not running (or dropped us)."""
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        s.connect(socket_path)
+    except OSError:
+        return None
+    with s:
+        body = dict(payload, api_key=api_key) if api_key else payload
+        try:
+            s.sendall(json.dumps(body).encode() + b"\n")
+            line = s.makefile("rb").readline()
+        except socket.timeout:
+            raise OpenAIError(f"daemon timed out after {timeout}s")
+        except OSError:
+            return None  # daemon went away mid-request; caller falls back
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise OpenAIError(f"unexpected daemon reply: {e}")
+
+
+def direct(payload, api_key, timeout=120, pool=None):
+    """POST /chat/completions without the daemon; returns the parsed JSON body.
+
+    With a ConnectionPool the request reuses its keep-alive connections.
+    """
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    if pool is not None:
+        try:
+            status, data = pool.post("/chat/completions", json.dumps(payload).encode(), headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise OpenAIError(str(e))
+        if status != 200:
+            raise OpenAIError(f"HTTP {status}: {data.decode(errors='replace')[:500]}", status)
+        return _parse(data)
+    req = urllib.request.Request(
+        f"{API_BASE}/chat/completions",
+        data=json.dumps(payload).encode(),
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            data = resp.read()
+    except urllib.error.HTTPError as e:
+        raise OpenAIError(f"HTTP {e.code}: {e.read().decode(errors='replace')[:500]}", e.code)
+    except (urllib.error.URLError, OSError) as e:
+        raise OpenAIError(str(e))
+    return _parse(data)
+
+
+def _parse(data):
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise OpenAIError(f"unexpected response: {e}", 200)
+
+
+def _message_text(data):
+    try:
+        return data["choices"][0]["message"].get("content") or ""
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise OpenAIError(f"unexpected response: {type(e).__name__}: {e}", 200)
+
+
+class CompletionStream:
+    """Iterate for text deltas; finish_reason is set once the stream completes."""
+
+    def __init__(self, payload, api_key=None, timeout=120, use_daemon=True):
+        self.payload = dict(payload, stream=True)
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+        self.timeout = timeout
+        self.use_daemon = use_daemon
+        self.finish_reason = None
+
+    def __iter__(self):
+        if self.use_daemon:
+            sock = self._open_daemon()
+            if sock is not None:
+                dropped = yield from self._from_daemon(sock)
+                if not dropped:
+                    return
+        yield from self._direct()
+
+    def _open_daemon(self):
+        """Connected socket with the request sent, or None if the daemon is not there."""
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(self.timeout)
+            s.connect(SOCKET_PATH)
+            body = dict(self.payload, api_key=self.api_key) if self.api_key else self.payload
+            s.sendall(json.dumps(body).encode() + b"\n")
+            return s
+        except OSError:
+            return None
+
+    def _from_daemon(self, sock):
+        """Relay deltas; returns True if the daemon dropped us before any output."""
+        started = False
+        with sock:
+            try:
+                for line in sock.makefile("rb"):
+                    msg = json.loads(line)
+                    if "delta" in msg:
+                        started = True
+                        if msg["delta"]:
+                            yield msg["delta"]
+                        continue
+                    if not msg.get("ok"):
+                        cls = StreamCutOff if started else OpenAIError
+                        raise cls(msg.get("error", "daemon error"), msg.get("status", 0))
+                    self.finish_reason = msg.get("finish_reason")
+                    return False
+            except socket.timeout:
+                raise StreamCutOff(f"no data from daemon for {self.timeout}s")
+            except OSError as e:
+                if not started:
+                    return True
+                raise StreamCutOff(f"daemon connection lost: {e}")
+        if not started:
+            return True
+        raise StreamCutOff("daemon closed the stream early")
+
+    def _direct(self):
+        if not self.api_key:
+            raise OpenAIError("OPENAI_API_KEY not set")
+        req = urllib.request.Request(
+            f"{API_BASE}/chat/completions",
+            data=json.dumps(self.payload).encode(),
+            headers={"Authorization": f"Bearer {self.api_key}",
+                     "Content-Type": "application/json", "Accept": "text/event-stream"},
+        )
+        try:
+            resp = urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise OpenAIError(f"HTTP {e.code}: {e.read().decode(errors='replace')[:500]}", e.code)
+        except (urllib.error.URLError, OSError) as e:
+            raise OpenAIError(str(e))
+        with resp:
+            try:
+                for text, finish in sse_deltas(resp):
+                    if finish:
+                        self.finish_reason = finish
+                    if text:
+                        yield text
+            except (OSError, http.client.HTTPException) as e:
+                raise StreamCutOff(f"connection lost mid-stream: {e}")
+
+
+def stream(payload, api_key=None, timeout=120, use_daemon=True):
+    """CompletionStream for one chat completions payload (stream=True is added)."""
+    return CompletionStream(payload, api_key=api_key, timeout=timeout, use_daemon=use_daemon)
+
+
+def _complete_once(payload, api_key, timeout, use_daemon, pool):
+    if use_daemon:
+        reply = _via_daemon(payload, api_key, timeout)
+        if reply is not None:
+            if not reply.get("ok"):
+                raise OpenAIError(reply.get("error", "daemon error"), reply.get("status", 0))
+            return reply.get("content") or ""
+    if not api_key:
+        raise OpenAIError("OPENAI_API_KEY not set", 401)  # what the API would say; never retried
+    return _message_text(direct(payload, api_key, timeout, pool))
+
+
+def complete(payload, api_key=None, timeout=120, use_daemon=True, pool=None, retries=RETRIES):
+    """Run one chat completions payload and return the message text.
+
+    Retryable failures are tried again up to `retries` times with backoff.
+    """
+    api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+    attempt = 0
+    while True:
+        try:
+            return _complete_once(payload, api_key, timeout, use_daemon, pool)
+        except OpenAIError as e:
+            attempt += 1
+            if attempt > retries or not retryable(e):
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+def chat(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=None,
+         api_key=None, timeout=120, use_daemon=True, retries=RETRIES):
+    """Convenience wrapper: messages in, completion text out."""
+    payload = build_payload(messages, model, temperature, max_tokens)
+    return complete(payload, api_key=api_key, timeout=timeout, use_daemon=use_daemon, retries=retries)
@@ -7,17 +7,56 @@ Usage in any agent script:
     sys.path.insert(0, '/Users/henryburton/.openclaw/workspace-anthropic/scripts/lib')
     from task_helpers import task_create, task_update, task_complete, task_fail
 
+Bulk variants send one PostgREST request per call (chunked so id and title
+filters stay within URL limits): task_create_many, task_complete_many, bulk_patch.
+
 All functions are no-ops if SUPABASE_SERVICE_ROLE_KEY is not set, so safe to call
 unconditionally in every script.
+
+Requests go through a pooled client that keeps one HTTP/1.1 keep-alive
+connection per thread, so repeated calls skip the TCP + TLS handshake. If
+httpx with HTTP/2 support is installed it is used instead. SUPABASE_URL
+overrides the endpoint (http:// works, e.g. for a local stand-in server).
+
+Non-blocking mode (enable_async(), or TASK_HELPERS_ASYNC=1 in the environment):
+task_update / task_complete / task_fail return immediately. A background
+worker coalesces successive changes to the same task (last description
+wins), flushes them in batches, retries failures and drains on exit.
+task_create stays synchronous because callers need the id.
+
+Journal mode (enable_journal(), or TASK_HELPERS_JOURNAL=1): every mutation is
+appended to a local JSONL write-ahead journal and the call returns at once;
+task_create generates the task id client-side. A background replayer pushes
+journal entries to Supabase in order once it is reachable. Creates are sent
+as idempotent upserts on the id, so replaying an entry twice never inserts
+a duplicate. Pending entries survive restarts; replay them from cron with:
+    python3 task_helpers.py replay
+
+task_create dedup lookups are cached in-process (TTL-bounded LRU keyed on
+title + agent), and task_complete / task_fail invalidate the entry. Set
+TASK_DEDUP_CACHE=1 (or call enable_shared_dedup_cache()) to also share the
+cache between script invocations through a small SQLite file.
 """
 
+import atexit
+import sqlite3
+import fcntl
 import json
 import os
+import sys
+import time
+import uuid
 import datetime
-import urllib.request
+import threading
+import http.client
 import urllib.parse
 
-_SUPABASE_URL = "https://afmpbtynucpbglwtbfuz.supabase.co"
+_SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://afmpbtynucpbglwtbfuz.supabase.co")
+_TIMEOUT = 10
+_WS = os.environ.get("AOS_ROOT", "/Users/henryburton/.openclaw/workspace-anthropic")
+_JOURNAL_PATH = os.environ.get("TASK_JOURNAL", f"{_WS}/tmp/task-journal.jsonl")
+_DEDUP_DB_PATH = os.environ.get("TASK_DEDUP_DB", f"{_WS}/tmp/task-dedup.sqlite")
+_DEDUP_TTL = float(os.environ.get("TASK_DEDUP_TTL", "300"))
 
 
 def _key():
@@ -33,39 +72,505 @@ def _headers():
     }
 
 
+class SupabaseHTTPError(Exception):
+    """Non-2xx response from PostgREST."""
+
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+        self.status = status
+        self.body = body
+
+
+class _PooledClient:
+    """Keep-alive HTTP client: one persistent connection per thread.
+
+    A request on a reused connection that the server has since closed is
+    retried once on a fresh connection.
+    """
+
+    _RETRYABLE = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                  ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, base_url, timeout=_TIMEOUT):
+        u = urllib.parse.urlsplit(base_url)
+        self._https = u.scheme == "https"
+        self._host = u.hostname
+        self._port = u.port
+        self._prefix = u.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = cls(self._host, self._port, timeout=self._timeout)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request and return (status, body_bytes)."""
+        url = f"{self._prefix}{path}"
+        for attempt in (0, 1):
+            conn = self._conn()
+            reused = conn.sock is not None
+            try:
+                conn.request(method, url, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except self._RETRYABLE:
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if resp.will_close:
+                self.close()
+            return resp.status, data
+
+
+class _HttpxClient:
+    """HTTP/2 client used when httpx (with h2) is installed."""
+
+    def __init__(self, base_url, timeout=_TIMEOUT):
+        import httpx
+        self._client = httpx.Client(base_url=base_url, http2=True, timeout=timeout)
+
+    def close(self):
+        self._client.close()
+
+    def request(self, method, path, body=None, headers=None):
+        r = self._client.request(method, path, content=body, headers=headers)
+        return r.status_code, r.content
+
+
+def _make_client(base_url):
+    try:
+        import h2  # noqa: F401 — httpx needs it for http2=True
+        return _HttpxClient(base_url)
+    except ImportError:
+        return _PooledClient(base_url)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _http():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _make_client(_SUPABASE_URL)
+    return _client
+
+
+def _request(method, path, body=None, prefer=None):
+    headers = _headers()
+    if prefer:
+        headers["Prefer"] = prefer
+    data = json.dumps(body).encode() if body is not None else None
+    status, raw = _http().request(method, f"/rest/v1/{path}", body=data, headers=headers)
+    if status >= 400:
+        raise SupabaseHTTPError(status, raw.decode("utf-8", errors="replace"))
+    return raw
+
+
 def _get(path):
-    req = urllib.request.Request(
-        f"{_SUPABASE_URL}/rest/v1/{path}",
-        headers=_headers(),
-    )
-    with urllib.request.urlopen(req, timeout=10) as r:
-        return json.loads(r.read())
-
-
-def _post(path, body):
-    data = json.dumps(body).encode()
-    h = {**_headers(), "Prefer": "return=representation"}
-    req = urllib.request.Request(
-        f"{_SUPABASE_URL}/rest/v1/{path}",
-        data=data,
-        headers=h,
-        method="POST",
-    )
-    with urllib.request.urlopen(req, timeout=10) as r:
-        return json.loads(r.read())
+    return json.loads(_request("GET", path))
+
+
+def _post(path, body, prefer="return=representation"):
+    raw = _request("POST", path, body, prefer=prefer)
+    return json.loads(raw) if raw else []
 
 
 def _patch(path, body):
-    data = json.dumps(body).encode()
-    h = {**_headers(), "Prefer": "return=minimal"}
-    req = urllib.request.Request(
-        f"{_SUPABASE_URL}/rest/v1/{path}",
-        data=data,
-        headers=h,
-        method="PATCH",
-    )
-    with urllib.request.urlopen(req, timeout=10)as r:
-        return r.read()
+    return _request("PATCH", path, body, prefer="return=minimal")
+
+
+class _EventQueue:
+    """Coalescing background queue for task PATCHes.
+
+    Pending changes are keyed by task id; a new change for a queued task is
+    merged into it, so only the latest value of each field is sent. A single
+    worker thread flushes up to `max_batch` requests per cycle over the pooled
+    connection, which keeps per-task ordering intact. Tasks whose pending
+    change is identical (e.g. from task_complete_many) share one id=in.(...)
+    PATCH.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, interval=0.5, max_batch=50):
+        self._interval = interval
+        self._max_batch = max_batch
+        self._pending = {}
+        self._attempts = {}
+        self._inflight = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="task-events", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, task_id, body):
+        self.put_many([task_id], body)
+
+    def put_many(self, task_ids, body):
+        with self._cond:
+            for task_id in task_ids:
+                self._pending.setdefault(task_id, {}).update(body)
+            self._cond.notify_all()
+
+    def _take(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # Let a burst of updates coalesce before sending. put() notifies on
+            # every change, so wait against a fixed deadline rather than once.
+            deadline = time.monotonic() + self._interval
+            self._cond.wait_for(lambda: self._closed or len(self._pending) >= self._max_batch,
+                                deadline - time.monotonic())
+            groups = {}
+            for tid, body in self._pending.items():
+                key = json.dumps(body, sort_keys=True)
+                if key not in groups and len(groups) >= self._max_batch:
+                    break
+                groups.setdefault(key, []).append(tid)
+            self._inflight = True
+            return [[(tid, self._pending.pop(tid)) for tid in ids] for ids in groups.values()]
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            failed = []
+            for items in batch:
+                ids = [task_id for task_id, _ in items]
+                try:
+                    _patch_ids(ids, items[0][1])
+                    for task_id in ids:
+                        self._attempts.pop(task_id, None)
+                except Exception as e:
+                    failed.extend((task_id, body, e) for task_id, body in items)
+            with self._cond:
+                for task_id, body, err in failed:
+                    n = self._attempts.get(task_id, 0) + 1
+                    if n >= self.MAX_ATTEMPTS:
+                        self._attempts.pop(task_id, None)
+                        print(f"[task_helpers] dropping update for {task_id}: {err}", file=sys.stderr)
+                        continue
+                    self._attempts[task_id] = n
+                    # Newer queued changes win over the failed ones
+                    body.update(self._pending.get(task_id, {}))
+                    self._pending[task_id] = body
+                self._inflight = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been sent. Returns True if drained."""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self, timeout=10):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+_queue = None
+
+
+def enable_async(interval=0.5, max_batch=50):
+    """Switch task_update/task_complete/task_fail to the non-blocking queue."""
+    global _queue
+    if _queue is None:
+        _queue = _EventQueue(interval, max_batch)
+    return _queue
+
+
+def flush(timeout=None):
+    """Wait for queued task updates to be sent. No-op in synchronous mode."""
+    return _queue.flush(timeout) if _queue is not None else True
+
+
+class _Journal:
+    """Append-only JSONL journal of task mutations plus an in-order replayer.
+
+    Records are {"op", "id", "body"}. Sending one twice is harmless: creates
+    are upserts on the client-generated id and patches set absolute values.
+    Appends take an flock on the journal, so several agent processes can share
+    one file. The replay position is kept in <journal>.offset, and the journal
+    is truncated once everything in it has been sent. Entries the server
+    rejects outright (4xx other than 429) are moved to <journal>.dead.
+    """
+
+    def __init__(self, path=_JOURNAL_PATH):
+        self.path = path
+        self._offset_path = path + ".offset"
+        self._lock_path = path + ".replay.lock"
+        self._dead_path = path + ".dead"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def append(self, op, task_id, body):
+        rec = {"op": op, "id": task_id, "body": body}
+        line = (json.dumps(rec, separators=(",", ":")) + "\n").encode()
+        with open(self.path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(line)
+        self._wake.set()
+
+    def _read_offset(self):
+        try:
+            with open(self._offset_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        tmp = self._offset_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp, self._offset_path)
+
+    @staticmethod
+    def _send(rec):
+        if rec["op"] == "create":
+            _post("tasks?on_conflict=id", {"id": rec["id"], **rec["body"]},
+                  prefer="resolution=ignore-duplicates,return=minimal")
+        elif isinstance(rec["id"], list):
+            _patch_ids(rec["id"], rec["body"])
+        else:
+            _patch(f"tasks?id=eq.{rec['id']}", rec["body"])
+
+    def _dead_letter(self, raw, err):
+        print(f"[task_helpers] journal entry rejected, moved to {self._dead_path}: {err}",
+              file=sys.stderr)
+        entry = raw.decode("utf-8", errors="replace").rstrip("\n")
+        with open(self._dead_path, "a") as f:
+            f.write(json.dumps({"error": str(err), "entry": entry}) + "\n")
+
+    def replay(self):
+        """Send pending entries in order.
+
+        Replay pauses at the first transport error, 429 or 5xx, leaving that
+        entry to be retried. Entries that are malformed or rejected with any
+        other status are dead-lettered and skipped.
+
+        Returns (sent, pending_left). Only one process replays at a time.
+        """
+        with open(self._lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0, True
+            sent = 0
+            offset = self._read_offset()
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                return 0, False
+            with f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    try:
+                        self._send(json.loads(raw))
+                    except SupabaseHTTPError as e:
+                        if e.status == 429 or e.status >= 500:
+                            print(f"[task_helpers] journal replay paused: {e}", file=sys.stderr)
+                            return sent, True
+                        self._dead_letter(raw, e)
+                    except (ValueError, KeyError, TypeError) as e:
+                        self._dead_letter(raw, f"malformed entry ({type(e).__name__}: {e})")
+                    except Exception as e:
+                        print(f"[task_helpers] journal replay paused: {e}", file=sys.stderr)
+                        return sent, True
+                    else:
+                        sent += 1
+                    offset += len(raw)
+                    self._write_offset(offset)
+            self._compact(offset)
+            return sent, False
+
+    def _compact(self, offset):
+        # Truncate only if nothing was appended since we finished reading
+        with open(self.path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            # The size must be read under the lock; tell() is from before we waited for it
+            if offset > 0 and os.fstat(f.fileno()).st_size == offset:
+                # Offset first: a crash in between re-sends entries (harmless), never skips them
+                self._write_offset(0)
+                f.truncate(0)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="task-journal", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+            self._wake.set()  # pick up entries left by earlier runs
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            self._wake.wait(timeout=30)
+            self._wake.clear()
+            stopping = self._stop.is_set()
+            _, pending = self.replay()
+            if stopping:
+                return  # that was the final pass
+            if pending:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                self._wake.set()
+            else:
+                backoff = 1.0
+
+    def close(self, timeout=2):
+        """Stop the replayer after one last pass, waiting up to `timeout` seconds.
+
+        Anything that could not be sent stays in the journal for the next run.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_journal = None
+
+
+def enable_journal(path=None):
+    """Route all task mutations through the local write-ahead journal."""
+    global _journal
+    if _journal is None:
+        _journal = _Journal(path or _JOURNAL_PATH)
+        _journal.start()
+    return _journal
+
+
+def replay_journal(path=None):
+    """Push pending journal entries to Supabase. Returns the number sent."""
+    j = _journal or _Journal(path or _JOURNAL_PATH)
+    return j.replay()[0]
+
+
+class _DedupCache:
+    """(title, agent) -> in-progress task id, TTL-bounded LRU.
+
+    With a shared path, entries are also written to a SQLite file so other
+    processes on the machine can skip the dedup round trip too.
+    """
+
+    def __init__(self, maxsize=256, ttl=_DEDUP_TTL):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._items = {}  # key -> (task_id, expires); dict order = LRU order
+        self._db_path = None
+
+    def enable_shared(self, path=_DEDUP_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with sqlite3.connect(path, timeout=2) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS dedup ("
+                       "title TEXT, agent TEXT, id TEXT, expires REAL, PRIMARY KEY (title, agent))")
+        self._db_path = path
+
+    def _db(self):
+        return sqlite3.connect(self._db_path, timeout=2)
+
+    def get(self, title, agent):
+        key = (title, agent)
+        now = time.time()
+        with self._lock:
+            hit = self._items.pop(key, None)
+            if hit and hit[1] > now:
+                self._items[key] = hit  # move to MRU end
+                return hit[0]
+        if self._db_path:
+            try:
+                with self._db() as db:
+                    row = db.execute("SELECT id, expires FROM dedup WHERE title = ? AND agent = ?",
+                                     key).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and row[1] > now:
+                self._remember(key, row[0], row[1])
+                return row[0]
+        return None
+
+    def _remember(self, key, task_id, expires):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (task_id, expires)
+            while len(self._items) > self._maxsize:
+                self._items.pop(next(iter(self._items)))
+
+    def put(self, title, agent, task_id):
+        expires = time.time() + self._ttl
+        self._remember((title, agent), task_id, expires)
+        if self._db_path:
+            try:
+                with self._db() as db:
+                    db.execute("INSERT OR REPLACE INTO dedup VALUES (?, ?, ?, ?)",
+                               (title, agent, task_id, expires))
+            except sqlite3.Error:
+                pass
+
+    def invalidate(self, task_id):
+        with self._lock:
+            for key in [k for k, v in self._items.items() if v[0] == task_id]:
+                del self._items[key]
+        if self._db_path:
+            try:
+                with self._db() as db:
+                    db.execute("DELETE FROM dedup WHERE id = ? OR expires < ?", (task_id, time.time()))
+            except sqlite3.Error:
+                pass
+
+
+_dedup = _DedupCache()
+
+
+def enable_shared_dedup_cache(path=None):
+    """Share task_create dedup results between processes via a SQLite file."""
+    _dedup.enable_shared(path or _DEDUP_DB_PATH)
+
+
+def _send_patch(task_id, body):
+    if body.get("status") == "done":
+        _dedup.invalidate(task_id)
+    if _journal is not None:
+        try:
+            _journal.append("patch", task_id, body)
+        except OSError:
+            pass
+        return
+    if _queue is not None:
+        _queue.put(task_id, body)
+        return
+    try:
+        _patch(f"tasks?id=eq.{task_id}", body)
+    except Exception:
+        pass
 
 
 def task_create(title, description="", agent="System", priority="normal"):
@@ -77,6 +582,13 @@ def task_create(title, description="", agent="System", priority="normal"):
     if not _key():
         return ""
 
+    cached = _dedup.get(title, agent)
+    if cached:
+        return cached
+
+    if _journal is not None:
+        return _journal_create(title, description, agent, priority)
+
     try:
         encoded_title = urllib.parse.quote(title)
         encoded_agent = urllib.parse.quote(agent)
@@ -85,30 +597,45 @@ def task_create(title, description="", agent="System", priority="normal"):
             f"&status=eq.in_progress&select=id&limit=1"
         )
         if existing:
-            return existing[0]["id"]
-
-        rows = _post("tasks", {
-            "title":       title[:120],
-            "description": description,
-            "assigned_to": agent,
-            "created_by":  agent,
-            "priority":    priority,
-            "status":      "in_progress",
-            "tags":        ["agent-run"],
-        })
-        return rows[0]["id"] if rows else ""
+            task_id = existing[0]["id"]
+        else:
+            rows = _post("tasks", _task_row(title, description, agent, priority))
+            task_id = rows[0]["id"] if rows else ""
     except Exception:
         return ""
+    if task_id:
+        _dedup.put(title, agent, task_id)
+    return task_id
+
+
+def _task_row(title, description, agent, priority):
+    return {
+        "title":       title[:120],
+        "description": description,
+        "assigned_to": agent,
+        "created_by":  agent,
+        "priority":    priority,
+        "status":      "in_progress",
+        "tags":        ["agent-run"],
+    }
+
+
+def _journal_create(title, description, agent, priority):
+    """Journal-mode create: id generated locally, no network on the caller's path."""
+    task_id = str(uuid.uuid4())
+    try:
+        _journal.append("create", task_id, _task_row(title, description, agent, priority))
+    except OSError:
+        return ""
+    _dedup.put(title, agent, task_id)
+    return task_id
 
 
 def task_update(task_id, description):
     """Update a task's description (progress note). No-op if task_id is empty."""
     if not _key() or not task_id:
         return
-    try:
-        _patch(f"tasks?id=eq.{task_id}", {"description": description})
-    except Exception:
-        pass
+    _send_patch(task_id, {"description": description})
 
 
 def task_complete(task_id, note=""):
@@ -121,20 +648,165 @@ def task_complete(task_id, note=""):
     }
     if note:
         body["description"] = note
-    try:
-        _patch(f"tasks?id=eq.{task_id}", body)
-    except Exception:
-        pass
+    _send_patch(task_id, body)
 
 
 def task_fail(task_id, error="Unknown error"):
     """Mark a task as failed."""
     if not _key() or not task_id:
         return
+    _send_patch(task_id, {
+        "status": "done",
+        "description": f"FAILED: {error}",
+    })
+
+
+# ── Bulk API ──────────────────────────────────────────────────────────────────
+
+_BULK_CHUNK = 250       # rows per POST body
+_IN_FILTER_BYTES = 4000  # encoded values per in.(...) filter — keeps URLs under common 8 KB limits
+
+
+def _chunks(items, size=_BULK_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _in_chunks(values, budget=_IN_FILTER_BYTES):
+    """Split values for in.(...) filters so each URL-encoded list stays within `budget` bytes."""
+    chunk, size = [], 0
+    for v in values:
+        n = len(urllib.parse.quote(v)) + 9  # quotes, backslashes and the comma, encoded
+        if chunk and size + n > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(v)
+        size += n
+    if chunk:
+        yield chunk
+
+
+def _patch_ids(task_ids, body):
+    """PATCH every id with the same body, one request per in.(...) chunk."""
+    if len(task_ids) == 1:
+        _patch(f"tasks?id=eq.{task_ids[0]}", body)
+        return
+    for chunk in _in_chunks(task_ids):
+        _patch(f"tasks?id=in.({','.join(chunk)})", body)
+
+
+def _in_list(values):
+    """PostgREST in.(...) list; values are double-quoted so commas/parens are safe."""
+    quoted = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return urllib.parse.quote(f"({','.join(quoted)})")
+
+
+def task_create_many(tasks, agent="System", priority="normal"):
+    """
+    Create many tasks with one dedup GET and one array POST.
+    `tasks` is a list of titles or dicts with title/description/agent/priority.
+    Returns ids in input order ("" for any that failed, or for all if key is not set).
+    Same dedup as task_create: an in_progress task with the same title+agent is reused.
+    """
+    if not _key():
+        return [""] * len(tasks)
+    specs = []
+    for t in tasks:
+        t = {"title": t} if isinstance(t, str) else t
+        specs.append((t["title"], t.get("description", ""), t.get("agent", agent),
+                      t.get("priority", priority)))
+
+    ids = [_dedup.get(title, ag) or "" for title, _, ag, _ in specs]
+    missing = [i for i, tid in enumerate(ids) if not tid]
+    if not missing:
+        return ids
+
+    if _journal is not None:
+        for i in missing:
+            ids[i] = _journal_create(*specs[i])
+        return ids
+
     try:
-        _patch(f"tasks?id=eq.{task_id}", {
-            "status": "done",
-            "description": f"FAILED: {error}",
-        })
+        # Stored titles are truncated to 120 chars, so look up and match on that
+        found = {}
+        titles = sorted({specs[i][0][:120] for i in missing})
+        for chunk in _in_chunks(titles):
+            for row in _get(f"tasks?title=in.{_in_list(chunk)}&status=eq.in_progress"
+                            f"&select=id,title,assigned_to"):
+                found.setdefault((row["title"], row["assigned_to"]), row["id"])
+
+        to_post, waiting = [], {}
+        for i in missing:
+            title, desc, ag, pri = specs[i]
+            key = (title[:120], ag)
+            if key in found:
+                ids[i] = found[key]
+                continue
+            if key not in waiting:
+                to_post.append(_task_row(title, desc, ag, pri))
+            waiting.setdefault(key, []).append(i)  # duplicates within this call share one row
+        for chunk in _chunks(to_post):
+            for row in _post("tasks", chunk):
+                for i in waiting.get((row["title"], row["assigned_to"]), ()):
+                    ids[i] = row["id"]
+    except Exception as e:
+        # ids from chunks that already went through are kept
+        print(f"[task_helpers] task_create_many failed: {e}", file=sys.stderr)
+
+    for (title, _, ag, _), tid in zip(specs, ids):
+        if tid:
+            _dedup.put(title, ag, tid)
+    return ids
+
+
+def bulk_patch(task_ids, body):
+    """PATCH many tasks with the same body using id=in.(...) filters. Returns True on success."""
+    ids = [t for t in task_ids if t]
+    if not _key() or not ids:
+        return False
+    if body.get("status") == "done":
+        for tid in ids:
+            _dedup.invalidate(tid)
+    if _journal is not None:
+        try:
+            _journal.append("patch", ids, body)
+            return True
+        except OSError:
+            return False
+    if _queue is not None:
+        _queue.put_many(ids, body)
+        return True
+    try:
+        _patch_ids(ids, body)
+        return True
     except Exception:
-        pass
+        return False
+
+
+def task_complete_many(task_ids, note=""):
+    """Mark many tasks done in one request, with an optional shared completion note."""
+    body = {
+        "status": "done",
+        "completed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    if note:
+        body["description"] = note
+    return bulk_patch(task_ids, body)
+
+
+if os.environ.get("TASK_DEDUP_CACHE") == "1":
+    enable_shared_dedup_cache()
+
+if os.environ.get("TASK_HELPERS_JOURNAL") == "1":
+    enable_journal()
+elif os.environ.get("TASK_HELPERS_ASYNC") == "1":
+    enable_async()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["replay"]:
+        sent, pending = _Journal(sys.argv[2] if len(sys.argv) > 2 else _JOURNAL_PATH).replay()
+        print(f"Replayed {sent} journal entries" + (" (more pending)" if pending else ""))
+        sys.exit(1 if pending else 0)
+    print("Usage: python3 task_helpers.py replay [journal_path]", file=sys.stderr)
+    sys.exit(2)
@@ -7,15 +7,268 @@ Usage:
   python3 openai-call.py < prompt.txt
   python3 openai-call.py prompt.txt
   echo "prompt" | python3 openai-call.py
+  python3 openai-call.py --stream prompt.txt
+  python3 openai-call.py --batch prompts.jsonl [--out results.jsonl]
+                         [--concurrency 8] [--rpm 500] [--retries 5]
+  python3 openai-call.py --cache-ttl 86400 prompt.txt   (works with all modes)
+
+--stream writes the reply as it is generated, flushing stdout at line and
+sentence boundaries. Exit status: 0 when complete, 1 if the stream is cut
+off (partial text may already have been written), 2 if the reply stopped
+at max_tokens.
+
+--cache-ttl SECONDS (or OPENAI_CACHE_TTL) opts in to a response cache keyed by
+sha256 of the full request (model, system + user prompt, temperature,
+max_tokens). A fresh hit is returned without an API call. Entries live in
+$AOS_ROOT/tmp/openai-call-cache.sqlite (OPENAI_CACHE_DB); once the stored
+replies exceed OPENAI_CACHE_MAX_BYTES (default 50 MB) the least recently used
+are evicted. Cut-off and max_tokens-truncated streams are not cached.
 
 Model: configured via OPENAI_MODEL env var (default: gpt-4o)
 Key:   configured via OPENAI_API_KEY env var
+
+Goes through the warm openai-complete-daemon.py when it is running and calls
+the API directly otherwise (see scripts/lib/openai_client.py).
 """
 
 import sys
 import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from openai_client import (  # noqa: E402
+    ConnectionPool, build_payload, complete, stream, OpenAIError, StreamCutOff, retryable, backoff_delay,
+)
+
+WS = os.environ.get('AOS_ROOT', '/Users/henryburton/.openclaw/workspace-anthropic')
+CACHE_DB = os.environ.get('OPENAI_CACHE_DB', f'{WS}/tmp/openai-call-cache.sqlite')
+CACHE_MAX_BYTES = int(os.environ.get('OPENAI_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+SYSTEM_PROMPT = (
+    "You are a highly capable AI assistant. "
+    "Follow all instructions in the user message exactly. "
+    "Be concise, accurate, and grounded in the context provided."
+)
+
+# Flush after a newline or sentence end; force a flush for long unbroken runs
+_BOUNDARY_RE = re.compile(r'\n|[.!?:;]["\')\]]?\s')
+MAX_UNFLUSHED = 200
+
+
+def write_stream(deltas, out=sys.stdout):
+    """Write deltas to out, flushing at boundaries. Returns the full text.
+
+    Text already received is written out even if the stream raises part way.
+    """
+    pending, parts = '', []
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            pending += delta
+            cut = 0
+            for m in _BOUNDARY_RE.finditer(pending):
+                cut = m.end()
+            if cut:
+                out.write(pending[:cut])
+                out.flush()
+                pending = pending[cut:]
+            elif len(pending) > MAX_UNFLUSHED:
+                out.write(pending)
+                out.flush()
+                pending = ''
+    finally:
+        out.write(pending)
+        out.flush()
+    return ''.join(parts)
+
+
+class ResponseCache:
+    """Replies keyed by sha256 of the request payload; TTL plus LRU eviction by total bytes."""
+
+    def __init__(self, ttl, path=CACHE_DB, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()  # shared by --batch worker threads
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, content TEXT NOT NULL, size INTEGER NOT NULL,
+            created REAL NOT NULL, used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses(used)")
+        self.db.commit()
+
+    @staticmethod
+    def key(payload):
+        body = {k: v for k, v in payload.items() if k != 'stream'}
+        return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT content, created FROM responses WHERE key = ?",
+                                  (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            self.db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            return row[0]
+
+    def put(self, key, content):
+        now = time.time()
+        size = len(content.encode())
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                            (key, content, size, now, now))
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from least recently used, dropping rows until we fit again
+                excess, doomed = total - self.max_bytes, []
+                for old_key, old_size in self.db.execute(
+                        "SELECT key, size FROM responses WHERE key != ? ORDER BY used", (key,)):
+                    if excess <= 0:
+                        break
+                    doomed.append((old_key,))
+                    excess -= old_size
+                self.db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self.db.commit()
+
+
+def open_cache(ttl):
+    if not ttl:
+        return None
+    try:
+        return ResponseCache(ttl)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[openai-call] cache unavailable: {e}", file=sys.stderr)
+        return None
+
+
+def cached(cache, payload):
+    """(key, cached_content_or_None); key is None when caching is off."""
+    if cache is None:
+        return None, None
+    key = ResponseCache.key(payload)
+    try:
+        return key, cache.get(key)
+    except sqlite3.Error:
+        return key, None
+
+
+def remember(cache, key, content):
+    if cache is not None and key is not None:
+        try:
+            cache.put(key, content)
+        except sqlite3.Error:
+            pass
+
+
+class TokenBucket:
+    """Thread-safe request rate limiter: `rate` tokens per second, up to `burst` saved."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _batch_item(line, index, model):
+    item = json.loads(line)
+    if isinstance(item, str):
+        item = {'prompt': item}
+    messages = [{"role": "system", "content": item.get('system', SYSTEM_PROMPT)},
+                {"role": "user", "content": item['prompt']}]
+    payload = build_payload(messages, item.get('model', model), item.get('temperature', 0.4),
+                            item.get('max_tokens', 4096))
+    return item.get('id', index), payload
+
+
+def run_batch(path, out, api_key, model, concurrency=8, rpm=500, retries=5, cache=None):
+    """Run every prompt in a JSONL file; write results in input order. Returns failure count."""
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+
+    bucket = TokenBucket(rpm / 60.0, burst=max(1, min(concurrency, rpm // 60 or 1)))
+    pool = ConnectionPool(max_idle=concurrency)  # only used when the daemon is not running
+
+    def run(index):
+        try:
+            item_id, payload = _batch_item(lines[index], index, model)
+        except (ValueError, KeyError, TypeError) as e:
+            return {'index': index, 'id': index, 'ok': False, 'error': f'bad input line: {e}', 'attempts': 0}
+        key, hit = cached(cache, payload)
+        if hit is not None:
+            return {'index': index, 'id': item_id, 'ok': True, 'content': hit, 'attempts': 0, 'cached': True}
+        for attempt in range(1, retries + 2):
+            bucket.acquire()
+            try:
+                # Retries happen here rather than in complete(), so each attempt goes through the bucket
+                content = complete(payload, api_key=api_key, pool=pool, retries=0)
+                remember(cache, key, content)
+                return {'index': index, 'id': item_id, 'ok': True, 'content': content, 'attempts': attempt}
+            except OpenAIError as e:
+                if attempt > retries or not retryable(e):
+                    return {'index': index, 'id': item_id, 'ok': False, 'error': str(e), 'attempts': attempt}
+                delay = backoff_delay(attempt)
+                print(f"[openai-call] #{index}: {e} — retry {attempt}/{retries} in {delay:.1f}s",
+                      file=sys.stderr)
+                time.sleep(delay)
+
+    started = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # map() yields in input order, so each result is written as soon as
+        # everything before it is done.
+        for result in executor.map(run, range(len(lines))):
+            failed += not result['ok']
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    print(f"[openai-call] batch: {len(lines)} prompt(s), {failed} failed, "
+          f"{time.monotonic() - started:.1f}s", file=sys.stderr)
+    return failed
+
+
+def _opt(args, flag, default):
+    if flag in args:
+        i = args.index(flag)
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+    return default
+
 
 def main():
+    args = [a for a in sys.argv[1:] if a != '--stream']
+    streaming = len(args) != len(sys.argv) - 1
+    batch = _opt(args, '--batch', None)
+    out_path = _opt(args, '--out', None)
+    concurrency = int(_opt(args, '--concurrency', os.environ.get('OPENAI_BATCH_CONCURRENCY', '8')))
+    rpm = int(_opt(args, '--rpm', os.environ.get('OPENAI_BATCH_RPM', '500')))
+    retries = int(_opt(args, '--retries', '5'))
+    if rpm < 1 or concurrency < 1:
+        print("[openai-call] ERROR: --rpm and --concurrency must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    cache = open_cache(float(_opt(args, '--cache-ttl', os.environ.get('OPENAI_CACHE_TTL', '0'))))
+
     api_key = os.environ.get('OPENAI_API_KEY', '')
     if not api_key:
         print("[openai-call] ERROR: OPENAI_API_KEY not set", file=sys.stderr)
@@ -23,9 +276,18 @@ def main():
 
     model = os.environ.get('OPENAI_MODEL', 'gpt-4o')
 
+    if batch:
+        out = open(out_path, 'w') if out_path else sys.stdout
+        try:
+            failed = run_batch(batch, out, api_key, model, concurrency, rpm, retries, cache)
+        finally:
+            if out_path:
+                out.close()
+        sys.exit(1 if failed else 0)
+
     # Read prompt from file arg or stdin
-    if len(sys.argv) > 1 and os.path.isfile(sys.argv[1]):
-        with open(sys.argv[1], 'r') as f:
+    if args and os.path.isfile(args[0]):
+        with open(args[0], 'r') as f:
             prompt = f.read()
     else:
         prompt = sys.stdin.read()
@@ -34,31 +296,37 @@ def main():
         print("[openai-call] ERROR: empty prompt", file=sys.stderr)
         sys.exit(1)
 
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+    payload = build_payload(messages, model, 0.4, 4096)
+    key, hit = cached(cache, payload)
+    if hit is not None:
+        print(hit)
+        return
+
+    if streaming:
+        reply = stream(payload, api_key=api_key)
+        try:
+            text = write_stream(reply)
+        except StreamCutOff as e:
+            print(f"\n[openai-call] ERROR: stream cut off: {e}", file=sys.stderr)
+            sys.exit(1)
+        except OpenAIError as e:
+            print(f"[openai-call] ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print()
+        if reply.finish_reason == 'length':
+            print("[openai-call] WARNING: reply truncated at max_tokens", file=sys.stderr)
+            sys.exit(2)
+        remember(cache, key, text)
+        return
+
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a highly capable AI assistant. "
-                        "Follow all instructions in the user message exactly. "
-                        "Be concise, accurate, and grounded in the context provided."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.4,
-            max_tokens=4096,
-        )
-
-        content = response.choices[0].message.content or ''
+        content = complete(payload, api_key=api_key)
+        remember(cache, key, content)
         print(content)
 
     except Exception as e:
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+openai-complete-daemon.py
+Local chat-completions daemon: one warm process with a keep-alive connection
+pool to the OpenAI API, serving scripts over a Unix socket.
+
+Run by the com.amalfiai.openai-complete-daemon LaunchAgent:
+  python3 openai-complete-daemon.py [--socket PATH]
+
+Clients (scripts/lib/openai_client.py — used by openai-call.py,
+ai-supervisor.py and openai-complete.sh) send one JSON line per request and
+fall back to calling the API directly when this daemon is not running, so
+stopping it never breaks anything.
+
+Each request is handled on its own thread and borrows an idle HTTPS
+connection from the pool (or opens one), so concurrent callers run in
+parallel and sequential callers skip the TCP + TLS handshake. The API key
+comes from the request's "api_key" field, else OPENAI_API_KEY in the
+daemon's environment / .env.scheduler.
+
+Requests with "stream": true are relayed token by token as {"delta": ...}
+lines, ending with {"ok": true, "done": true, "finish_reason": ...}, or
+{"ok": false, ...} if the upstream stream breaks.
+"""
+
+import http.client
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from openai_client import SOCKET_PATH, API_BASE, ConnectionPool, StreamCutOff, sse_deltas  # noqa: E402
+
+WS = os.environ.get('AOS_ROOT', '/Users/henryburton/.openclaw/workspace-anthropic')
+ENV_FILE = f'{WS}/.env.scheduler'
+
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] [openai-daemon] {msg}", file=sys.stderr, flush=True)
+
+
+def load_env_key() -> str:
+    key = os.environ.get('OPENAI_API_KEY', '')
+    if key:
+        return key
+    try:
+        with open(ENV_FILE) as f:
+            for line in f:
+                line = line.strip().removeprefix('export ')
+                if line.startswith('OPENAI_API_KEY='):
+                    return line.split('=', 1)[1].strip().strip('"\'')
+    except OSError:
+        pass
+    return ''
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                self.server.serve_request(line, self.send)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away (e.g. a stream reader exited early)
+
+    def send(self, msg: dict):
+        self.wfile.write(json.dumps(msg).encode() + b'\n')
+        self.wfile.flush()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        self.pool = ConnectionPool()
+        self.env_key = load_env_key()
+        self.served = 0
+        super().__init__(path, Handler)
+
+    def serve_request(self, line: bytes, send):
+        try:
+            payload = json.loads(line)
+        except ValueError as e:
+            send({'ok': False, 'error': f'bad request: {e}'})
+            return
+        api_key = payload.pop('api_key', '') or self.env_key
+        if not api_key:
+            send({'ok': False, 'error': 'OPENAI_API_KEY not set'})
+            return
+        headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
+        if payload.get('stream'):
+            self.relay_stream(payload, headers, send)
+        else:
+            send(self.complete(payload, headers))
+
+    def relay_stream(self, payload: dict, headers: dict, send):
+        started = time.monotonic()
+        headers = dict(headers, Accept='text/event-stream')
+        try:
+            conn, resp = self.pool.open_stream('/chat/completions', json.dumps(payload).encode(), headers)
+        except Exception as e:
+            send({'ok': False, 'error': f'{type(e).__name__}: {e}'})
+            return
+        if resp.status != 200:
+            data = resp.read()
+            self.pool.finish(conn, resp)
+            send({'ok': False, 'status': resp.status,
+                  'error': f'HTTP {resp.status}: {data.decode(errors="replace")[:500]}'})
+            return
+        finish_reason, clean, first = None, False, None
+        try:
+            for text, finish in sse_deltas(iter(resp.readline, b'')):
+                if first is None:
+                    first = time.monotonic() - started
+                finish_reason = finish or finish_reason
+                if text:
+                    send({'delta': text})
+            clean = True
+        except StreamCutOff as e:
+            send({'ok': False, 'error': str(e)})
+        except (OSError, http.client.HTTPException) as e:
+            send({'ok': False, 'error': f'upstream lost mid-stream: {e}'})
+        finally:
+            if clean:
+                resp.read()  # drain the terminating chunk so the connection can be reused
+            self.pool.finish(conn, resp, clean)
+        if clean:
+            self.served += 1
+            send({'ok': True, 'done': True, 'finish_reason': finish_reason})
+            log(f"{payload.get('model', '?')} stream: first token {first or 0:.2f}s, "
+                f"total {time.monotonic() - started:.2f}s (served {self.served})")
+
+    def complete(self, payload: dict, headers: dict) -> dict:
+        started = time.monotonic()
+        try:
+            status, data = self.pool.post('/chat/completions', json.dumps(payload).encode(), headers)
+        except Exception as e:
+            return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+        self.served += 1
+        if status != 200:
+            return {'ok': False, 'status': status,
+                    'error': f'HTTP {status}: {data.decode(errors="replace")[:500]}'}
+        try:
+            content = json.loads(data)['choices'][0]['message'].get('content') or ''
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            return {'ok': False, 'status': status, 'error': f'unexpected response: {type(e).__name__}: {e}'}
+        log(f"{payload.get('model', '?')}: {time.monotonic() - started:.2f}s "
+            f"(served {self.served}, connections opened {self.pool.opened})")
+        return {'ok': True, 'content': content}
+
+
+def main():
+    path = SOCKET_PATH
+    if '--socket' in sys.argv:
+        path = sys.argv[sys.argv.index('--socket') + 1]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    old_umask = os.umask(0o077)  # socket readable by this user only
+    server = Server(path)
+    os.umask(old_umask)
+
+    def stop(*_):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    log(f"listening on {path} → {API_BASE}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == '__main__':
+    main()
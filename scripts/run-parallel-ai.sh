@@ -1,7 +1,8 @@
 #!/bin/bash
 # run-parallel-ai.sh
 # Runs a prompt through Claude AND GPT-4o simultaneously.
-# A supervisor (gpt-4o-mini) picks the better response.
+# A supervisor picks the better response — local heuristics first, with a
+# one-word gpt-4o-mini verdict only when the two are close (--race).
 # Falls back gracefully to Claude if OpenAI is unavailable.
 #
 # Usage: run-parallel-ai.sh <prompt_file>
@@ -97,4 +98,4 @@ echo "[parallel-ai] Both responded — running supervisor..." >&2
 echo "$RESP_A" > "$TMP_A"
 echo "$RESP_B" > "$TMP_B"
 
-python3 "$WS/scripts/ai-supervisor.py" "$PROMPT_FILE" "$TMP_A" "$TMP_B"
+python3 "$WS/scripts/ai-supervisor.py" --race "$PROMPT_FILE" "$TMP_A" "$TMP_B"
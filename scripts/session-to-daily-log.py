@@ -5,27 +5,142 @@ Converts an OpenClaw JSONL session file into a readable daily chat MD.
 
 Usage:
   python3 session-to-daily-log.py <session.jsonl> [--out <output.md>]
+  python3 session-to-daily-log.py <session.jsonl> --follow --out <output.md>
+  python3 session-to-daily-log.py --batch <dir|glob> --out-dir <dir> [--jobs N]
 
 If --out not specified, outputs to stdout.
+
+--follow tails the session file like `tail -F`: only new entries are
+formatted and appended to --out, and the byte offset is checkpointed to
+<output.md>.offset so a restarted follower resumes where it stopped.
+
+--batch parses many session files concurrently and writes one <YYYY-MM-DD>.md
+per SAST day into --out-dir. Entries are bucketed by their own timestamp, so
+sessions that cross midnight land on the right day, and each day's entries
+are k-way merged from the per-session streams.
 """
 
+import glob
+import heapq
+import os
 import sys
 import json
 import re
+import time
 import argparse
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+SAST = timezone(timedelta(hours=2))
+
+
+# Injection markers stripped from user messages. Start markers and their ends
+# are located with str.find (a fast substring scan), so cleaning is a single
+# linear pass with no lazy-quantifier backtracking on large injected messages.
+_MEMORIES_OPEN  = '<relevant-memories>'
+_MEMORIES_CLOSE = '</relevant-memories>'
+_SYSTEM_MSG     = '[System Message]'
+_CONV_INFO      = 'Conversation info (untrusted metadata):'
+_CONV_INFO_END  = '```\n'
+_TS_PREFIX_RE   = re.compile(r'\[.*?GMT[+-]\d+\]\s*')
+
+
+def _system_message_end(text: str, i: int) -> int:
+    """End of a [System Message] block: the next blank line, or end of text.
+
+    Memory blocks inside the span are skipped over, and a blank line formed
+    by removing one ("\\n<relevant-memories>…</relevant-memories>\\n") ends
+    the span just as it would once the block is gone.
+    """
+    n = len(text)
+    while True:
+        nl = text.find('\n\n', i)
+        stop = nl if nl >= 0 else n
+        mem = text.find(_MEMORIES_OPEN, i, stop)
+        if mem < 0:
+            return stop
+        close = text.find(_MEMORIES_CLOSE, mem)
+        if close < 0:
+            return stop
+        after = close + len(_MEMORIES_CLOSE)
+        if text[mem - 1:mem] == '\n' and text[after:after + 1] == '\n':
+            return mem - 1
+        i = after
+
+
+def _conv_info_end(text: str, i: int) -> int:
+    """Index of the ``` fence closing a metadata block, or -1.
+
+    Memory and [System Message] blocks are stripped before metadata blocks,
+    so a fence inside one of them does not count.
+    """
+    while True:
+        fence = text.find(_CONV_INFO_END, i)
+        if fence < 0:
+            return -1
+        mem = text.find(_MEMORIES_OPEN, i, fence)
+        close = text.find(_MEMORIES_CLOSE, mem) if mem >= 0 else -1
+        sys_msg = text.find(_SYSTEM_MSG, i, fence)
+        if close >= 0 and (sys_msg < 0 or mem < sys_msg):
+            i = close + len(_MEMORIES_CLOSE)
+        elif sys_msg >= 0:
+            i = _system_message_end(text, sys_msg + len(_SYSTEM_MSG))
+        else:
+            return fence
 
 
 def clean_user_text(text: str) -> str:
-    """Strip OpenClaw system injections from user messages."""
-    # Remove <relevant-memories> blocks
-    text = re.sub(r'<relevant-memories>.*?</relevant-memories>', '', text, flags=re.DOTALL)
-    # Remove [System Message] blocks
-    text = re.sub(r'\[System Message\].*?(?=\n\n|\Z)', '', text, flags=re.DOTALL)
-    # Remove Conversation info JSON blocks
-    text = re.sub(r'Conversation info \(untrusted metadata\):.*?```\n', '', text, flags=re.DOTALL)
-    # Remove timestamp prefixes like [Fri 2026-02-20 09:24 GMT+2]
-    text = re.sub(r'^\[.*?GMT[+-]\d+\]\s*', '', text.strip())
+    """Strip OpenClaw system injections from user messages.
+
+    Removes <relevant-memories> blocks, [System Message] blocks (up to the
+    next blank line), "Conversation info (untrusted metadata):" JSON blocks
+    and a leading timestamp prefix like [Fri 2026-02-20 09:24 GMT+2].
+
+    Output matches the previous four sequential regex passes (see
+    bench/bench-clean-user-text.py), except for a ``` fence that only forms
+    once a block between its backticks has been removed.
+    """
+    markers = (_MEMORIES_OPEN, _SYSTEM_MSG, _CONV_INFO)
+    # Next occurrence of each marker at or after pos (-1 once exhausted)
+    nxt = [text.find(mk) for mk in markers]
+    # Once a terminator is missing, no later one exists — skip re-scanning
+    memories_closed = conv_info_closed = True
+    out = []
+    pos = 0
+    while True:
+        for k, mk in enumerate(markers):
+            if 0 <= nxt[k] < pos:
+                nxt[k] = text.find(mk, pos)
+        live = [(p, k) for k, p in enumerate(nxt) if p >= 0]
+        if not live:
+            out.append(text[pos:])
+            break
+        start, k = min(live)
+        marker_end = start + len(markers[k])
+        if k == 0:
+            close = text.find(_MEMORIES_CLOSE, marker_end) if memories_closed else -1
+            if close < 0:
+                memories_closed = False
+                out.append(text[pos:marker_end])  # unclosed — keep it
+                pos = marker_end
+                continue
+            end = close + len(_MEMORIES_CLOSE)
+        elif k == 1:
+            end = _system_message_end(text, marker_end)
+        else:
+            close = _conv_info_end(text, marker_end) if conv_info_closed else -1
+            if close < 0:
+                conv_info_closed = False
+                out.append(text[pos:marker_end])
+                pos = marker_end
+                continue
+            end = close + len(_CONV_INFO_END)
+        out.append(text[pos:start])
+        pos = end
+
+    text = ''.join(out).strip()
+    m = _TS_PREFIX_RE.match(text)
+    if m:
+        text = text[m.end():]
     return text.strip()
 
 
@@ -52,13 +167,44 @@ def format_ts(ts_str: str) -> str:
     try:
         dt = datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
         # Convert to SAST (UTC+2)
-        from datetime import timedelta
-        dt_sast = dt.astimezone(timezone(timedelta(hours=2)))
+        dt_sast = dt.astimezone(SAST)
         return dt_sast.strftime('%H:%M')
     except Exception:
         return ts_str
 
 
+def parse_record(obj: dict):
+    """Turn one JSONL record into ('compaction', summary), ('entry', entry) or None."""
+    t = obj.get('type', '')
+
+    if t == 'compaction':
+        return 'compaction', obj.get('summary', '')
+
+    if t == 'message':
+        msg = obj.get('message', {})
+        role = msg.get('role', '')
+        content = msg.get('content', '')
+        ts = obj.get('timestamp', '')
+
+        raw_text = extract_text(content)
+
+        if role == 'user':
+            text = clean_user_text(raw_text)
+            if not text:
+                return None
+            return 'entry', {'role': 'user', 'ts': ts, 'text': text}
+        elif role == 'assistant':
+            # Skip pure tool-use-only messages (no readable text)
+            text = extract_text(content)
+            # Filter out messages that are only tool calls
+            visible = re.sub(r'\[tool: \w+\]', '', text).strip()
+            if not visible:
+                return None
+            return 'entry', {'role': 'assistant', 'ts': ts, 'text': visible}
+
+    return None
+
+
 def parse_session(path: str) -> list:
     entries = []
     compaction_summary = None
@@ -73,84 +219,271 @@ def parse_session(path: str) -> list:
             except json.JSONDecodeError:
                 continue
 
-            t = obj.get('type', '')
-
-            if t == 'compaction':
-                compaction_summary = obj.get('summary', '')
-
-            elif t == 'message':
-                msg = obj.get('message', {})
-                role = msg.get('role', '')
-                content = msg.get('content', '')
-                ts = obj.get('timestamp', '')
-
-                raw_text = extract_text(content)
-
-                if role == 'user':
-                    text = clean_user_text(raw_text)
-                    if not text:
-                        continue
-                    entries.append({'role': 'user', 'ts': ts, 'text': text})
-                elif role == 'assistant':
-                    # Skip pure tool-use-only messages (no readable text)
-                    text = extract_text(content)
-                    # Filter out messages that are only tool calls
-                    visible = re.sub(r'\[tool: \w+\]', '', text).strip()
-                    if not visible:
-                        continue
-                    entries.append({'role': 'assistant', 'ts': ts, 'text': visible})
+            parsed = parse_record(obj)
+            if parsed is None:
+                continue
+            kind, value = parsed
+            if kind == 'compaction':
+                compaction_summary = value
+            else:
+                entries.append(value)
 
     return entries, compaction_summary
 
 
+def format_compaction(summary: str) -> list:
+    return [
+        '## Prior context (compaction summary)',
+        '',
+        summary.strip(),
+        '',
+        '---',
+        '',
+    ]
+
+
+def format_entry(entry: dict) -> list:
+    ts = format_ts(entry['ts'])
+    name = 'Josh' if entry['role'] == 'user' else 'Alex'
+    return [f'**{name}** `{ts}`', '', entry['text'], '', '---', '']
+
+
 def build_md(entries: list, compaction_summary: str, date_str: str) -> str:
     lines = [f'# Chat Log — {date_str}', '']
 
     if compaction_summary:
-        lines.append('## Prior context (compaction summary)')
-        lines.append('')
-        lines.append(compaction_summary.strip())
-        lines.append('')
-        lines.append('---')
-        lines.append('')
+        lines.extend(format_compaction(compaction_summary))
 
     if not entries:
         lines.append('_(no messages)_')
         return '\n'.join(lines)
 
     for entry in entries:
-        role = entry['role']
-        ts = format_ts(entry['ts'])
-        text = entry['text']
+        lines.extend(format_entry(entry))
 
-        if role == 'user':
-            lines.append(f'**Josh** `{ts}`')
-        else:
-            lines.append(f'**Alex** `{ts}`')
+    return '\n'.join(lines)
 
-        lines.append('')
-        lines.append(text)
-        lines.append('')
-        lines.append('---')
-        lines.append('')
 
-    return '\n'.join(lines)
+# ── Batch mode ────────────────────────────────────────────────────────────────
+
+def _parse_epoch(ts_str: str):
+    try:
+        dt = datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def bucket_session(args) -> tuple:
+    """Parse one session into per-SAST-day entry streams. Runs in a pool worker.
+
+    Returns (days, compactions): days maps 'YYYY-MM-DD' to a list of
+    (epoch, session_idx, seq, entry) tuples sorted by time, ready for
+    heapq.merge; compactions maps a day to its compaction summaries.
+    Records without a usable timestamp inherit the previous record's time.
+    """
+    path, session_idx = args
+    days, compactions = {}, {}
+    last_epoch = None
+
+    with open(path, 'r') as f:
+        for seq, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(obj, dict):
+                continue
+
+            epoch = _parse_epoch(obj.get('timestamp', ''))
+            if epoch is None:
+                epoch = last_epoch
+            else:
+                last_epoch = epoch
+
+            parsed = parse_record(obj)
+            if parsed is None or epoch is None:
+                continue
+            day = datetime.fromtimestamp(epoch, SAST).strftime('%Y-%m-%d')
+            kind, value = parsed
+            if kind == 'compaction':
+                if value:
+                    compactions.setdefault(day, []).append(value)
+            else:
+                days.setdefault(day, []).append((epoch, session_idx, seq, value))
+
+    for stream in days.values():
+        stream.sort(key=lambda item: item[:3])  # near-sorted already; timsort is ~linear
+    return days, compactions
+
+
+def expand_batch(spec: str) -> list:
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, '*.jsonl')))
+    return sorted(glob.glob(spec))
+
+
+def build_batch(paths: list, out_dir: str, jobs: int = 0) -> dict:
+    """Write one daily log per SAST day covered by `paths`. Returns {day: count}."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = jobs or os.cpu_count() or 1
+    streams, compactions = {}, {}
+    work = [(p, i) for i, p in enumerate(paths)]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(bucket_session, work))
+    else:
+        results = [bucket_session(w) for w in work]
+
+    for days, comp in results:
+        for day, stream in days.items():
+            streams.setdefault(day, []).append(stream)
+        for day, summaries in comp.items():
+            compactions.setdefault(day, []).extend(summaries)
+
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for day in sorted(streams.keys() | compactions.keys()):
+        merged = heapq.merge(*streams.get(day, []), key=lambda item: item[:3])
+        entries = [item[3] for item in merged]
+        summary = '\n\n'.join(compactions.get(day, [])) or None
+        with open(os.path.join(out_dir, f'{day}.md'), 'w') as f:
+            f.write(build_md(entries, summary, day))
+        counts[day] = len(entries)
+    return counts
+
+
+# ── Follow mode ───────────────────────────────────────────────────────────────
+
+def _load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(path: str, data: dict):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def follow_session(session: str, out: str, date_str: str, interval: float = 1.0):
+    """Tail `session` and append newly formatted entries to `out` until interrupted.
+
+    Survives truncation and replacement of the session file (like tail -F):
+    a new inode or a file shorter than the checkpoint restarts from byte 0.
+    The checkpoint also records the size of `out`, which is truncated back to
+    it on resume, so entries appended just before a crash are not repeated.
+    """
+    ckpt_path = out + '.offset'
+    ckpt = _load_checkpoint(ckpt_path)
+    if not os.path.exists(out):
+        ckpt = {}
+    offset = ckpt.get('offset', 0)
+    inode = ckpt.get('inode')
+
+    if not ckpt:
+        with open(out, 'w') as f:
+            f.write(f'# Chat Log — {date_str}\n\n')
+    elif ckpt.get('out_size') is not None and os.path.getsize(out) > ckpt['out_size']:
+        # Appended after the last checkpoint; those entries are re-read from `offset`
+        os.truncate(out, ckpt['out_size'])
+
+    print(f'Following {session} -> {out} (from byte {offset})', file=sys.stderr)
+    try:
+        while True:
+            try:
+                st = os.stat(session)
+            except FileNotFoundError:
+                time.sleep(interval)
+                continue
+
+            if inode is not None and (st.st_ino != inode or st.st_size < offset):
+                print('Session file replaced or truncated — restarting from 0', file=sys.stderr)
+                offset = 0
+            inode = st.st_ino
+
+            if st.st_size > offset:
+                lines = []
+                with open(session, 'rb') as f:
+                    f.seek(offset)
+                    for raw in f:
+                        if not raw.endswith(b'\n'):
+                            break  # partial line — wait for the writer to finish it
+                        offset += len(raw)
+                        try:
+                            obj = json.loads(raw.decode('utf-8', errors='replace'))
+                        except json.JSONDecodeError:
+                            continue
+                        parsed = parse_record(obj) if isinstance(obj, dict) else None
+                        if parsed is None:
+                            continue
+                        kind, value = parsed
+                        lines.extend(format_compaction(value) if kind == 'compaction' else format_entry(value))
+
+                if lines:
+                    with open(out, 'a') as f:
+                        f.write('\n'.join(lines) + '\n')
+                _save_checkpoint(ckpt_path, {'session': session, 'inode': inode, 'offset': offset,
+                                             'out_size': os.path.getsize(out)})
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
 
 
 def main():
     parser = argparse.ArgumentParser(description='Convert OpenClaw session JSONL to daily chat MD')
-    parser.add_argument('session', help='Path to session .jsonl file')
+    parser.add_argument('session', nargs='?', help='Path to session .jsonl file')
     parser.add_argument('--out', help='Output markdown file path', default=None)
     parser.add_argument('--date', help='Date label (default: today SAST)', default=None)
+    parser.add_argument('--follow', action='store_true',
+                        help='Tail the session and append new entries to --out (checkpointed)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Poll interval in seconds for --follow (default: 1)')
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help='Build per-day logs from many session files')
+    parser.add_argument('--out-dir', help='Output directory for --batch (one <date>.md per day)')
+    parser.add_argument('--jobs', type=int, default=0,
+                        help='Worker processes for --batch (default: one per core)')
     args = parser.parse_args()
 
+    if args.batch:
+        if not args.out_dir:
+            parser.error('--batch requires --out-dir')
+        paths = expand_batch(args.batch)
+        if not paths:
+            parser.error(f'no session files match {args.batch}')
+        counts = build_batch(paths, args.out_dir, args.jobs)
+        for day, n in counts.items():
+            print(f'{day}: {n} messages')
+        print(f'Written {len(counts)} daily logs from {len(paths)} sessions to {args.out_dir}')
+        return
+
+    if not args.session:
+        parser.error('a session file is required (or use --batch)')
+    if args.follow and not args.out:
+        parser.error('--follow requires --out')
+
     if args.date:
         date_str = args.date
     else:
-        from datetime import timedelta
-        now_sast = datetime.now(timezone(timedelta(hours=2)))
+        now_sast = datetime.now(SAST)
         date_str = now_sast.strftime('%Y-%m-%d')
 
+    if args.follow:
+        follow_session(args.session, args.out, date_str, args.interval)
+        return
+
     entries, compaction_summary = parse_session(args.session)
     md = build_md(entries, compaction_summary, date_str)
 
@@ -1,68 +1,463 @@
 #!/usr/bin/env python3
 """
 telegram-batch-dispatcher.py
-Called as a background process each time a Telegram text message arrives.
+Coalesces bursts of Telegram text messages into one telegram-claude-gateway.sh run.
 
-Waits 3 seconds, then checks if it was the LAST message in the burst.
-If so, collects all buffered messages and fires telegram-claude-gateway.sh once.
-If a newer message arrived during the wait, exits silently (that dispatcher handles it).
+Daemon mode (preferred) — one long-lived process, run by the
+com.amalfiai.telegram-batcher LaunchAgent:
+  python3 telegram-batch-dispatcher.py --serve
 
-Usage: python3 telegram-batch-dispatcher.py <chat_id> [group_history_file]
-"""
+  The poller writes one JSON line per message to the Unix socket at
+  $AOS_ROOT/tmp/tg-batcher.sock:
+    {"chat_id": "...", "text": "...", "group_hist": "...", "profile": "josh"}
+  and gets "ok" back once the message is held. Each chat has its own asyncio
+  debounce timer. When a chat has been quiet for its window the combined
+  batch is dispatched to the gateway exactly once.
+
+  The quiet window is learned per chat: the daemon records the gaps between
+  consecutive messages in a burst and waits for a high quantile of that
+  chat's recent gaps (p80, or p95 when the last message looks unfinished),
+  clamped to [TG_BATCH_QUIET_MIN, TG_BATCH_QUIET_MAX]. Fast typists get
+  replies sooner; slow typists' bursts stay together. Until a chat has
+  enough gaps, the window comes from the batch itself: short for a single
+  complete-looking message, longer while a burst is still arriving. The
+  chosen window is logged with each dispatch. Gap history is saved to
+  tmp/tg-batch-gaps.json.
 
-import sys, time, os, subprocess
+  Ready batches go through a dispatch scheduler: at most
+  TG_BATCH_MAX_CONCURRENT (default 2) gateway runs at once, one at a time
+  per chat in arrival order, with chats served round-robin so one busy chat
+  cannot starve the rest. Queue depth and wait time are logged with each
+  start and are available from the running daemon:
+    python3 telegram-batch-dispatcher.py --stats
 
-if len(sys.argv) < 2:
-    sys.exit(1)
+Legacy mode — called as a background process for each message when the
+daemon is not running:
+  python3 telegram-batch-dispatcher.py <chat_id> [group_history_file] [user_profile]
 
-chat_id      = sys.argv[1]
-group_hist   = sys.argv[2] if len(sys.argv) > 2 else ''
-user_profile = sys.argv[3] if len(sys.argv) > 3 else 'josh'
+  Waits for the chat's learned quiet window (3 seconds when there is no
+  history), then checks if it was the LAST message in the burst.
+  If so, collects all buffered messages and fires telegram-claude-gateway.sh once,
+  after taking one of TG_BATCH_MAX_CONCURRENT slot locks in tmp/.
+  If a newer message arrived during the wait, exits silently (that dispatcher handles it).
+"""
+
+import sys, time, os, subprocess, json, asyncio, signal, fcntl
+from collections import deque
 
 WS = os.environ.get('AOS_ROOT', '/Users/henryburton/.openclaw/workspace-anthropic')
-batch_file = f"{WS}/tmp/tg-batch-{chat_id}.txt"
-last_file  = f"{WS}/tmp/tg-batch-{chat_id}.last"
-
-# Wait for the burst to settle
-time.sleep(3)
-
-# Check if a newer message arrived after we woke up
-try:
-    last_t = float(open(last_file).read())
-except Exception:
-    last_t = 0
-
-if time.time() - last_t < 2.8:
-    # A newer message arrived — let that dispatcher handle the whole batch
-    sys.exit(0)
-
-# Atomically claim the batch (os.rename is atomic on same filesystem)
-claimed = batch_file + '.claimed'
-try:
-    os.rename(batch_file, claimed)
-except OSError:
-    sys.exit(0)  # Another dispatcher claimed it first — we're done
-
-try:
-    combined = open(claimed).read().strip()
-    os.remove(claimed)
+GATEWAY = f'{WS}/scripts/telegram-claude-gateway.sh'
+GATEWAY_ERR_LOG = f'{WS}/out/gateway-errors.log'
+SOCKET_PATH = f'{WS}/tmp/tg-batcher.sock'
+
+GAPS_FILE = f'{WS}/tmp/tg-batch-gaps.json'
+
+# Adaptive quiet window (seconds)
+QUIET_MIN = float(os.environ.get('TG_BATCH_QUIET_MIN', '0.8'))
+QUIET_MAX = float(os.environ.get('TG_BATCH_QUIET_MAX', '6.0'))
+QUIET_DEFAULT = 3.0        # legacy mode, before the chat has enough history
+QUIET_PER_MSG = 0.6        # cold start: extra wait per message already in the burst
+QUIET_OPEN_ENDED = 1.2     # cold start: extra wait when the last message looks unfinished
+SPLIT_FACTOR = 1.5         # a gap up to 1.5x the window that just fired counts as a split burst
+GAP_HISTORY = 200          # recent intra-burst gaps kept per chat
+MIN_SAMPLES = 5
+MARGIN = 1.15              # safety factor on the chosen quantile
+
+# Gateway runs allowed at once, across all chats
+MAX_CONCURRENT = max(1, int(os.environ.get('TG_BATCH_MAX_CONCURRENT', '2')))
+WAIT_HISTORY = 500         # recent queue waits kept for the stats percentiles
+
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] [batcher] {msg}", file=sys.stderr, flush=True)
+
+
+# ── Daemon mode ───────────────────────────────────────────────────────────────
+
+def looks_unfinished(text: str) -> bool:
+    last = text.rstrip()
+    return not last or last[-1] not in '.?!)"\'' or len(last) < 12
+
+
+def quiet_window(texts: list) -> float:
+    """Cold-start window for a batch, from its size and how its last message ends."""
+    window = QUIET_MIN + QUIET_PER_MSG * (len(texts) - 1)
+    if looks_unfinished(texts[-1]):
+        window += QUIET_OPEN_ENDED  # fragment / mid-thought — likely more coming
+    return min(max(window, QUIET_MIN), QUIET_MAX)
+
+
+def _quantile(values, q):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class GapModel:
+    """Per-chat distribution of gaps between messages within a burst."""
+
+    def __init__(self, path: str = GAPS_FILE):
+        self.path = path
+        self.gaps = {}
+        self.last_at = {}
+        self.last_window = {}
+        self._dirty = 0
+        try:
+            with open(path) as f:
+                for chat_id, values in json.load(f).items():
+                    self.gaps[chat_id] = deque(values, maxlen=GAP_HISTORY)
+        except (OSError, ValueError):
+            pass
+
+    def observe(self, chat_id: str, now: float, in_burst: bool):
+        """Record the gap since the chat's previous message.
+
+        A gap counts when the previous message's batch was still waiting, or
+        when it arrived shortly after that batch fired (a burst we split).
+        Longer gaps are a new conversation and are ignored.
+        """
+        prev = self.last_at.get(chat_id)
+        self.last_at[chat_id] = now
+        if prev is None:
+            return
+        window = self.last_window.get(chat_id, QUIET_DEFAULT)
+        if len(self.gaps.get(chat_id, ())) < MIN_SAMPLES:
+            window = max(window, QUIET_DEFAULT)  # cold-start windows are short; keep learning
+        limit = window * SPLIT_FACTOR
+        if in_burst or now - prev <= limit:
+            self.gaps.setdefault(chat_id, deque(maxlen=GAP_HISTORY)).append(round(now - prev, 3))
+            self._dirty += 1
+            if self._dirty >= 20:
+                self.save()
+
+    def window(self, chat_id: str, texts: list = ()):
+        """(window_seconds, description) for this chat's pending batch."""
+        samples = self.gaps.get(chat_id, ())
+        if len(samples) < MIN_SAMPLES:
+            if texts:
+                window, basis = quiet_window(texts), f'heuristic, {len(samples)} samples'
+            else:
+                window, basis = QUIET_DEFAULT, f'default, {len(samples)} samples'
+        else:
+            q = 0.95 if texts and looks_unfinished(texts[-1]) else 0.80
+            window = min(max(_quantile(samples, q) * MARGIN, QUIET_MIN), QUIET_MAX)
+            basis = f'p{int(q * 100)} of {len(samples)} gaps'
+        self.last_window[chat_id] = window
+        return window, basis
+
+    def save(self):
+        self._dirty = 0
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({k: list(v) for k, v in self.gaps.items()}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+class Batch:
+    __slots__ = ('texts', 'group_hist', 'profile', 'first_at', 'timer', 'window', 'basis')
+
+    def __init__(self):
+        self.texts = []
+        self.group_hist = ''
+        self.profile = 'josh'
+        self.first_at = time.monotonic()
+        self.timer = None
+        self.window = 0.0
+        self.basis = ''
+
+
+class Scheduler:
+    """Caps concurrent gateway runs; per-chat FIFO, round-robin across chats.
+
+    Each chat has its own queue and at most one run in flight, so a chat's
+    batches are answered in order. Chats with work wait in a rotation and
+    are started in turn whenever a slot frees up.
+    """
+
+    def __init__(self, loop, limit: int = MAX_CONCURRENT):
+        self.loop = loop
+        self.limit = limit
+        self.queues = {}        # chat_id -> deque of (enqueued_at, combined, group_hist, profile)
+        self.rotation = deque() # chats with queued work and nothing in flight
+        self.active = set()     # chats with a gateway run in flight
+        self.waits = deque(maxlen=WAIT_HISTORY)
+        self.started = 0
+        self.failed = 0
+        self.tasks = set()      # running _run tasks; the loop itself only keeps weak refs
+
+    def submit(self, chat_id: str, combined: str, group_hist: str, profile: str):
+        queue = self.queues.setdefault(chat_id, deque())
+        queue.append((time.monotonic(), combined, group_hist, profile))
+        if len(queue) == 1 and chat_id not in self.active:
+            self.rotation.append(chat_id)
+        self._pump()
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def _pump(self):
+        while self.rotation and len(self.active) < self.limit:
+            chat_id = self.rotation.popleft()
+            queue = self.queues[chat_id]
+            enqueued_at, combined, group_hist, profile = queue.popleft()
+            if not queue:
+                del self.queues[chat_id]
+            waited = time.monotonic() - enqueued_at
+            self.waits.append(waited)
+            self.active.add(chat_id)
+            self.started += 1
+            log(f"chat {chat_id}: gateway start (waited {waited:.2f}s, "
+                f"running {len(self.active)}/{self.limit}, queued {self.depth()})")
+            task = self.loop.create_task(self._run(chat_id, combined, group_hist, profile))
+            self.tasks.add(task)
+            task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log(f"gateway task crashed: {task.exception()!r}")
+
+    async def _run(self, chat_id: str, combined: str, group_hist: str, profile: str):
+        err_log = None
+        try:
+            try:
+                err_log = open(GATEWAY_ERR_LOG, 'a')
+            except OSError:
+                pass  # fall back to the daemon's own stderr
+            proc = await asyncio.create_subprocess_exec(
+                'bash', GATEWAY, chat_id, combined, group_hist, 'text', profile,
+                stdout=asyncio.subprocess.DEVNULL, stderr=err_log,
+            )
+            code = await proc.wait()
+            if code != 0:
+                self.failed += 1
+                log(f"chat {chat_id}: gateway exited {code}")
+        except Exception as e:
+            self.failed += 1
+            log(f"chat {chat_id}: gateway failed to start: {e}")
+        finally:
+            if err_log is not None:
+                err_log.close()
+            self.active.discard(chat_id)
+            if chat_id in self.queues:
+                self.rotation.append(chat_id)
+            self._pump()
+
+    def stats(self) -> dict:
+        waits = list(self.waits)
+        return {
+            'running': len(self.active),
+            'limit': self.limit,
+            'queue_depth': self.depth(),
+            'queued_chats': len(self.queues),
+            'started': self.started,
+            'failed': self.failed,
+            'wait_p50': round(_quantile(waits, 0.50), 3) if waits else 0.0,
+            'wait_p95': round(_quantile(waits, 0.95), 3) if waits else 0.0,
+            'wait_max': round(max(waits), 3) if waits else 0.0,
+        }
+
+    def busy(self) -> bool:
+        return bool(self.active or self.queues)
+
+
+class Coalescer:
+    """Per-chat debounce: every new message re-arms that chat's timer."""
+
+    def __init__(self, loop, model: GapModel, scheduler: Scheduler):
+        self.loop = loop
+        self.model = model
+        self.scheduler = scheduler
+        self.pending = {}
+
+    def add(self, chat_id: str, text: str, group_hist: str, profile: str):
+        batch = self.pending.get(chat_id)
+        self.model.observe(chat_id, time.monotonic(), in_burst=batch is not None)
+        if batch is None:
+            batch = self.pending[chat_id] = Batch()
+        batch.texts.append(text)
+        batch.group_hist = group_hist or batch.group_hist
+        batch.profile = profile or batch.profile
+        if batch.timer is not None:
+            batch.timer.cancel()
+        batch.window, batch.basis = self.model.window(chat_id, batch.texts)
+        batch.timer = self.loop.call_later(batch.window, self._fire, chat_id)
+
+    def _fire(self, chat_id: str):
+        batch = self.pending.pop(chat_id, None)
+        if batch is None:
+            return
+        combined = '\n\n'.join(batch.texts).strip()
+        if not combined:
+            return
+        waited = time.monotonic() - batch.first_at
+        log(f"chat {chat_id}: dispatching {len(batch.texts)} msg(s) after {waited:.2f}s "
+            f"(window {batch.window:.2f}s, {batch.basis})")
+        self.scheduler.submit(chat_id, combined, batch.group_hist, batch.profile)
+
+    def flush_all(self):
+        """Dispatch everything still waiting (used on shutdown)."""
+        for chat_id, batch in list(self.pending.items()):
+            if batch.timer is not None:
+                batch.timer.cancel()
+            self._fire(chat_id)
+
+
+async def serve(socket_path: str = SOCKET_PATH):
+    loop = asyncio.get_running_loop()
+    model = GapModel()
+    scheduler = Scheduler(loop)
+    coalescer = Coalescer(loop, model, scheduler)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    if msg.get('cmd') == 'stats':
+                        writer.write((json.dumps(scheduler.stats()) + '\n').encode())
+                        await writer.drain()
+                        continue
+                    coalescer.add(str(msg['chat_id']), msg.get('text', ''),
+                                  msg.get('group_hist', ''), msg.get('profile', 'josh'))
+                    writer.write(b'ok\n')
+                except (ValueError, KeyError) as e:
+                    writer.write(f'error {e}\n'.encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
     try:
-        os.remove(last_file)
-    except Exception:
+        os.unlink(socket_path)
+    except FileNotFoundError:
         pass
-except Exception:
-    sys.exit(0)
-
-if not combined:
-    sys.exit(0)
-
-# Fire the gateway with the full combined batch
-subprocess.run([
-    'bash',
-    f'{WS}/scripts/telegram-claude-gateway.sh',
-    chat_id,
-    combined,
-    group_hist,
-    'text',
-    user_profile,
-])
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    log(f"listening on {socket_path} (quiet window {QUIET_MIN}-{QUIET_MAX}s, "
+        f"max {scheduler.limit} concurrent)")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with server:
+        await stop.wait()
+    log("shutting down — flushing pending batches")
+    coalescer.flush_all()
+    model.save()
+    deadline = time.monotonic() + 120
+    while scheduler.busy() and time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+
+def daemon_stats(socket_path: str = SOCKET_PATH, timeout: float = 1.0):
+    """Scheduler stats from the running daemon, or None if it is not reachable."""
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path)
+            s.sendall(b'{"cmd": "stats"}\n')
+            return json.loads(s.makefile('rb').readline())
+    except (OSError, ValueError):
+        return None
+
+
+# ── Legacy per-message mode ───────────────────────────────────────────────────
+
+def acquire_slot():
+    """Block until one of MAX_CONCURRENT gateway slots is free; return its locked file."""
+    os.makedirs(f'{WS}/tmp', exist_ok=True)
+    while True:
+        for i in range(MAX_CONCURRENT):
+            f = open(f'{WS}/tmp/tg-batch-slot-{i}.lock', 'w')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        time.sleep(0.25)
+
+
+def legacy_main(chat_id, group_hist, user_profile):
+    batch_file = f"{WS}/tmp/tg-batch-{chat_id}.txt"
+    last_file  = f"{WS}/tmp/tg-batch-{chat_id}.last"
+
+    # Wait for the burst to settle — per-chat learned window when available
+    window, basis = GapModel().window(str(chat_id))
+    print(f"[batcher] chat {chat_id}: legacy window {window:.2f}s ({basis})", file=sys.stderr)
+    time.sleep(window)
+
+    # Check if a newer message arrived after we woke up
+    try:
+        last_t = float(open(last_file).read())
+    except Exception:
+        last_t = 0
+
+    if time.time() - last_t < window - 0.2:
+        # A newer message arrived — let that dispatcher handle the whole batch
+        return
+
+    # Atomically claim the batch (os.rename is atomic on same filesystem)
+    claimed = batch_file + '.claimed'
+    try:
+        os.rename(batch_file, claimed)
+    except OSError:
+        return  # Another dispatcher claimed it first — we're done
+
+    try:
+        combined = open(claimed).read().strip()
+        os.remove(claimed)
+        try:
+            os.remove(last_file)
+        except Exception:
+            pass
+    except Exception:
+        return
+
+    if not combined:
+        return
+
+    # Fire the gateway with the full combined batch, within the global cap
+    slot = acquire_slot()
+    try:
+        subprocess.run([
+            'bash',
+            GATEWAY,
+            chat_id,
+            combined,
+            group_hist,
+            'text',
+            user_profile,
+        ])
+    finally:
+        slot.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(1)
+    if sys.argv[1] == '--serve':
+        asyncio.run(serve(sys.argv[2] if len(sys.argv) > 2 else SOCKET_PATH))
+    elif sys.argv[1] == '--stats':
+        stats = daemon_stats()
+        if stats is None:
+            print('batcher daemon not running', file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(stats, indent=2))
+    else:
+        legacy_main(
+            sys.argv[1],
+            sys.argv[2] if len(sys.argv) > 2 else '',
+            sys.argv[3] if len(sys.argv) > 3 else 'josh',
+        )
@@ -18,6 +18,8 @@ echo ""
 AGENTS=(
   com.amalfiai.sophia-cron
   com.amalfiai.telegram-poller
+  com.amalfiai.telegram-batcher
+  com.amalfiai.openai-complete-daemon
   com.amalfiai.morning-brief
   com.amalfiai.heartbeat
   com.amalfiai.silence-detection
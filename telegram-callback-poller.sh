@@ -139,6 +139,19 @@ os.makedirs(f"{WS_ROOT}/tmp", exist_ok=True)
 os.makedirs(f"{WS_ROOT}/out", exist_ok=True)
 GATEWAY_ERR_LOG = f"{WS_ROOT}/out/gateway-errors.log"
 
+def _send_to_batcher(chat_id, text, group_hist, profile):
+    """Hand a text message to the batcher daemon's socket. False if it is not running."""
+    import socket as _socket
+    try:
+        with _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM) as _s:
+            _s.settimeout(1.0)
+            _s.connect(f"{WS_ROOT}/tmp/tg-batcher.sock")
+            _s.sendall((json.dumps({'chat_id': str(chat_id), 'text': text,
+                                    'group_hist': group_hist, 'profile': profile}) + '\n').encode())
+            return _s.makefile('rb').readline().startswith(b'ok')
+    except OSError:
+        return False
+
 # Clean up temp media files older than 3 days on each poller start
 import glob, time as _time
 _cutoff = _time.time() - (3 * 86400)
@@ -2422,6 +2435,10 @@ for u in updates:
                 ], stdout=subprocess.DEVNULL, stderr=open(GATEWAY_ERR_LOG, 'a'))
             except Exception:
                 pass
+        elif _send_to_batcher(chat_id, text, group_history_file, user_profile):
+            # Batcher daemon (telegram-batch-dispatcher.py --serve) holds the message
+            # and dispatches the whole burst once the chat goes quiet
+            pass
         else:
             # Batch: buffer the message, spawn dispatcher that waits 3s for more messages
             batch_file = f"{WS}/tmp/tg-batch-{chat_id}.txt"